@@ -0,0 +1,73 @@
+import heapq
+
+
+class CandidateStore:
+    # Keeps the best candidate classifiers of the validation in memory, bounded to the top
+    # capacity ones. Only the classifiers still in the top are written to disk by persist().
+    # When the classifiers in memory exceed spill_bytes, the worst ones are saved right away
+    # and dropped from memory; a spilled classifier leaving the top is deleted from disk
+    # through the storage SmartClassifier.
+
+    def __init__(self, storage, capacity=5, spill_bytes=64 * 1024 * 1024):
+        self._storage = storage
+        self._capacity = capacity
+        self._spill_bytes = spill_bytes
+        # max-heap on the rank: (-rank, -index, uuid), the worst candidate on top
+        self._heap = []
+        # uuid -> [model, smart classifier or None when spilled]
+        self._entries = {}
+        self._memory_bytes = 0
+        self._spilled = 0
+
+    def add(self, rank, index, model, smart_classifier):
+        # Returns True if the candidate enters the top, lower rank first and lower index on ties
+        uuid = model["uuid"]
+        item = (-rank, -index, uuid)
+        if len(self._heap) >= self._capacity:
+            if item <= self._heap[0]:
+                return False
+            _, _, evicted = heapq.heapreplace(self._heap, item)
+            self._discard(evicted)
+        else:
+            heapq.heappush(self._heap, item)
+
+        self._entries[uuid] = [model, smart_classifier]
+        self._memory_bytes += smart_classifier.memory_size()
+        self._spill()
+        return True
+
+    def _discard(self, uuid):
+        _, smart_classifier = self._entries.pop(uuid)
+        if smart_classifier is None:
+            # it had been spilled
+            self._storage.delete_classifier(uuid)
+        else:
+            self._memory_bytes -= smart_classifier.memory_size()
+
+    def _spill(self):
+        # saves the worst in-memory candidates until the memory is under the threshold
+        for _, _, uuid in sorted(self._heap):
+            if self._memory_bytes <= self._spill_bytes:
+                return
+            entry = self._entries[uuid]
+            if entry[1] is None:
+                continue
+            entry[1].save_classifier(uuid)
+            self._memory_bytes -= entry[1].memory_size()
+            entry[1] = None
+            self._spilled += 1
+
+    def persist(self):
+        # writes the candidates still in memory
+        for uuid, entry in self._entries.items():
+            if entry[1] is not None:
+                entry[1].save_classifier(uuid)
+                self._memory_bytes -= entry[1].memory_size()
+                entry[1] = None
+
+    def get_models(self):
+        # models of the top candidates, best first
+        return [self._entries[uuid][0] for _, _, uuid in sorted(self._heap, reverse=True)]
+
+    def get_spilled(self):
+        return self._spilled
@@ -39,3 +39,10 @@ class CommunicationConfig:
         if not ip or not port:
             raise ValueError(f"[ERROR] Invalid config for '{system_name}': missing ip or port.")
         return ip, port
+
+    def get_http_pool(self):
+        """
+        Returns (pool_connections, pool_maxsize) of the outgoing HTTP connection pools
+        """
+        http_pool = self._config.get("http_pool", {})
+        return http_pool.get("pool_connections", 4), http_pool.get("pool_maxsize", 8)
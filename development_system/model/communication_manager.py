@@ -5,13 +5,20 @@ from threading import Thread
 
 import requests
 from flask import Flask, request
-from requests import post, exceptions
+from requests import exceptions
 
 from dotenv import load_dotenv
 from pathlib import Path
 
 from development_system.model.communication_config import CommunicationConfig
+from development_system.model.learning_set_data import LearningDataSetBuilder
 from development_system.utility.json_read_write import JsonReadWrite
+from development_system.utility.pooled_transport import PooledTransport
+from development_system.utility.wire_format import WireRequest
+
+
+# Read size of the streamed learning sets
+STREAM_BLOCK_BYTES = 1024 * 1024
 
 
 class CommunicationManager:
@@ -21,12 +28,15 @@ class CommunicationManager:
         # Flask instance to receive data
 
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
         # a thread-safe queue to buffer the received json message
         self._received_json_queue = queue.Queue()
         """"
         # ******** Needed by the Development System *******
         """
         self.communication_config = CommunicationConfig()
+        PooledTransport.get_instance().configure(*self.communication_config.get_http_pool())
         self._winner_uuid = None
         """"
         # ******** Needed by the Development System *******
@@ -69,7 +79,7 @@ class CommunicationManager:
         url = f'http://{ip}:{port}/' + endpoint
         response = None
         try:
-            response = post(url, json=data, timeout=10.0)
+            response = PooledTransport.get_instance().post(url, json=data, timeout=10.0)
         except exceptions.RequestException:
             print("Endpoint system unreachable")
             return False
@@ -96,7 +106,7 @@ class CommunicationManager:
 
         try:
             with open(file_path, 'rb') as f:
-                response = requests.post(url, files={'file': f}, timeout=3)
+                response = PooledTransport.get_instance().post(url, files={'file': f}, timeout=3)
 
             if response.status_code == 200:
                 print("[INFO] WinnerClassifier deployed successfully.")
@@ -121,7 +131,7 @@ class CommunicationManager:
 
         try:
             with open(file_path, 'rb') as f:
-                response = requests.post(url, files={'file': f}, timeout=5)
+                response = PooledTransport.get_instance().post(url, files={'file': f}, timeout=5)
 
             if response.status_code == 200:
                 print("[INFO] WinnerClassifier deployed successfully.")
@@ -156,6 +166,30 @@ def post_json():
     return {}, 200
 
 
+@app.post('/learning_sets/stream')
+def post_learning_sets_stream():
+    # NDJSON body, parsed while it is received; read in blocks, line iteration of
+    # a chunked request stream is one read per line
+    builder = LearningDataSetBuilder()
+    pending = b''
+    try:
+        while True:
+            block = request.stream.read(STREAM_BLOCK_BYTES)
+            if not block:
+                break
+            *lines, pending = (pending + block).split(b'\n')
+            for line in lines:
+                if line.strip():
+                    builder.add_line(line)
+        if pending.strip():
+            builder.add_line(pending)
+    except (ValueError, KeyError, TypeError) as e:
+        return {'error': f'Malformed learning sets stream: {e}'}, 400
+
+    CommunicationManager.get_instance().put_json_into_queue(builder.build())
+    return {}, 200
+
+
 @app.route("/")
 def home():
     return "Development System online!"
@@ -1,9 +1,38 @@
+import json
+
+import numpy as np
+
+# Column order of the data matrices, same order of the "features" of every record
+FEATURES = [
+    "mean_current",
+    "mean_voltage",
+    "mean_temperature",
+    "mean_external_temperature",
+    "mean_external_humidity",
+    "mean_occupancy"
+]
+
 
 class LearningDataSet:
     _instance = {}
     def __init__(self):
         pass
 
+    @staticmethod
+    def to_arrays(records, label_map=None):
+        """
+        Builds the (records, features) float64 matrix and the label vector of a split
+        with a single conversion, consumed by the classifier without further copies.
+        Labels keep the class names unless a label_map is given: the trained classifier
+        is deployed to the production system, which reads its predictions back with
+        LabelType.from_string, so the model must be fitted on the names, not on codes.
+        """
+        data = np.array([rec["features"] for rec in records], dtype=np.float64).reshape(-1, len(FEATURES))
+        labels = [rec["label"] for rec in records]
+        if label_map is not None:
+            labels = [label_map.get(label, -1) for label in labels]
+        return {"data": data, "labels": np.array(labels)}
+
     @staticmethod
     def set_from_external_format(data):
             """
@@ -12,71 +41,31 @@ class LearningDataSet:
             into internal format used by the system.
             """
             mapped = {
-                "train": {"data": [], "labels": []},
-                "validation": {"data": [], "labels": []},
-                "test": {"data": [], "labels": []},
+                "train": LearningDataSet.to_arrays([]),
+                "validation": LearningDataSet.to_arrays([]),
+                "test": LearningDataSet.to_arrays([]),
             }
 
             label_map = {"none": 0, "overheating": 1, "electrical": 2}
             for phase, records in data.items():
                 # normalize the key name (training -> train)
                 key = "train" if phase == "training" else phase
-                for rec in records:
-                    mapped[key]["data"].append(rec["features"])
-                    mapped[key]["labels"].append(label_map.get(rec["label"], -1))
+                mapped[key] = LearningDataSet.to_arrays(records, label_map)
 
             LearningDataSet._instance = mapped
             print("[INFO] External dataset loaded into LearningDataSet.")
 
     @staticmethod
     def set_data(data):
-        LearningDataSet._instance = {
-            "training" : {
-                "data": {
-                    "mean_current":[],
-                    "mean_voltage":[],
-                    "mean_temperature":[],
-                    "mean_external_temperature":[],
-                    "mean_external_humidity":[],
-                    "mean_occupancy":[]
-                },
-                "labels" : [],
-            },
-            "validation" : {
-                "data": {
-                    "mean_current":[],
-                    "mean_voltage":[],
-                    "mean_temperature":[],
-                    "mean_external_temperature":[],
-                    "mean_external_humidity":[],
-                    "mean_occupancy":[]
-                },
-                "labels" : [],
-            },
-            "test" : {
-                "data": {
-                    "mean_current":[],
-                    "mean_voltage":[],
-                    "mean_temperature":[],
-                    "mean_external_temperature":[],
-                    "mean_external_humidity":[],
-                    "mean_occupancy":[]
-                },
-                "labels" : [],
-            }
-        }
+        LearningDataSet._instance = {}
 
         categories = ["training", "validation", "test"]
         for category in categories:
-            for feature in data[category]:
-                label = feature["label"]
-                LearningDataSet._instance[category]["labels"].append(label)
-                LearningDataSet._instance[category]["data"]["mean_current"].append(feature["features"][0])
-                LearningDataSet._instance[category]["data"]["mean_voltage"].append(feature["features"][1])
-                LearningDataSet._instance[category]["data"]["mean_temperature"].append(feature["features"][2])
-                LearningDataSet._instance[category]["data"]["mean_external_temperature"].append(feature["features"][3])
-                LearningDataSet._instance[category]["data"]["mean_external_humidity"].append(feature["features"][4])
-                LearningDataSet._instance[category]["data"]["mean_occupancy"].append(feature["features"][5])
+            if isinstance(data[category], dict):
+                # already parsed into arrays by the streaming endpoint
+                LearningDataSet._instance[category] = data[category]
+            else:
+                LearningDataSet._instance[category] = LearningDataSet.to_arrays(data[category])
 
     @staticmethod
     def get_data(category):
@@ -84,3 +73,43 @@ class LearningDataSet:
             raise KeyError(f"[ERROR] '{category}' data not found. Make sure set_data() or set_from_external_format() was called.")
         return LearningDataSet._instance[category]
 
+
+class LearningDataSetBuilder:
+    # Fills the LearningDataSet arrays one session at a time while the streamed learning sets
+    # are received, rows are packed into float64 blocks so that no per-session dict is kept
+    BLOCK_ROWS = 4096
+
+    def __init__(self):
+        self._blocks = {"training": [], "validation": [], "test": []}
+        self._rows = {"training": [], "validation": [], "test": []}
+        self._labels = {"training": [], "validation": [], "test": []}
+
+    def add_line(self, line):
+        # one NDJSON line: {"set": ..., "features": [...], "label": ...}
+        record = json.loads(line)
+        category = record["set"]
+        if category not in self._rows:
+            raise ValueError(f"Unknown learning set '{category}'")
+        features = record["features"]
+        if len(features) != len(FEATURES):
+            raise ValueError(f"Expected {len(FEATURES)} features, got {len(features)}")
+
+        rows = self._rows[category]
+        rows.append(features)
+        self._labels[category].append(record["label"])
+        if len(rows) >= LearningDataSetBuilder.BLOCK_ROWS:
+            self._blocks[category].append(np.array(rows, dtype=np.float64))
+            rows.clear()
+
+    def build(self):
+        # same {category: {"data", "labels"}} layout of LearningDataSet.to_arrays
+        learning_sets = {}
+        for category, blocks in self._blocks.items():
+            rows = self._rows[category]
+            blocks = blocks + [np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))]
+            learning_sets[category] = {
+                "data": np.concatenate(blocks),
+                # class names, as in to_arrays
+                "labels": np.array(self._labels[category])
+            }
+        return learning_sets
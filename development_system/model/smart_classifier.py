@@ -1,7 +1,7 @@
 import warnings
 import os
-import pandas as pd
 import joblib
+import numpy as np
 
 from dotenv import load_dotenv
 from pathlib import Path
@@ -34,7 +34,8 @@ class SmartClassifier:
         self.winner_joblib_path = Path(__file__).resolve().parents[2] / winner_joblib_path_from_root
 
     def train_model(self, training_data, training_labels):
-        training_data = pd.DataFrame(training_data)
+        # float64 matrices of the LearningDataSet are used as they are
+        training_data = np.asarray(training_data, dtype=np.float64)
         self._classifier.fit(training_data, training_labels)
 
     def update_classifier_config(self, new_config: SMARTClassifierConfig):
@@ -55,12 +56,20 @@ class SmartClassifier:
                 "num_iterations",
                 new_config.num_iterations
             )
+        self.configure(new_config)
+
+    def configure(self, new_config: SMARTClassifierConfig):
+        """
+        Reconfigure the underlying classifier without touching the JSON config file,
+        used by the grid search workers.
+        """
         self._classifier_config = new_config
         self._classifier.set_params(**new_config.to_dict())
 
     def get_error(self, data, labels):
-        data = pd.DataFrame(data)
-        return self._classifier.score(data, labels)
+        # misclassification rate, 1 - accuracy: lower is better
+        data = np.asarray(data, dtype=np.float64)
+        return 1.0 - self._classifier.score(data, labels)
 
     def grab_training_losses(self):
         return self._classifier.loss_curve_
@@ -73,6 +82,17 @@ class SmartClassifier:
         file_path.parent.mkdir(parents=True, exist_ok=True)
         joblib.dump(self._classifier, file_path)
 
+    def delete_classifier(self, uuid):
+        file_path = Path(self.classifiers_path) / f"{str(uuid).upper()}.joblib"
+        if file_path.is_file():
+            file_path.unlink()
+
+    def memory_size(self):
+        # bytes of the fitted weights, 0 before training
+        coefs = getattr(self._classifier, "coefs_", [])
+        intercepts = getattr(self._classifier, "intercepts_", [])
+        return sum(array.nbytes for array in coefs) + sum(array.nbytes for array in intercepts)
+
     def load_classifier(self, uuid):
         if uuid is None:
             raise ValueError("uuid cannot be None")
@@ -4,15 +4,19 @@ Represents one configuration chosen at runtime.
 and Inputs the MLP a dictionary Object.
 """
 class SMARTClassifierConfig:
-    def __init__(self, iterations=0, hidden_layer_sizes=None):
+    def __init__(self, iterations=0, hidden_layer_sizes=None, random_state=None, warm_start=False):
         if hidden_layer_sizes is None:
             hidden_layer_sizes = []
         self.num_iterations = iterations
         self.hidden_layer_sizes = hidden_layer_sizes
+        self.random_state = random_state
+        self.warm_start = warm_start
 
     def to_dict(self):
         #MLP loves a dictionary params, LOL
         return {
             "max_iter": self.num_iterations,
-            "hidden_layer_sizes": self.hidden_layer_sizes
+            "hidden_layer_sizes": self.hidden_layer_sizes,
+            "random_state": self.random_state,
+            "warm_start": self.warm_start
         }
@@ -1,17 +1,61 @@
 import math
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from itertools import product
-from operator import itemgetter
 
 from dotenv import load_dotenv
 from pathlib import Path
 
 from development_system.generator.report_generator import ReportGenerator
+from development_system.model.candidate_store import CandidateStore
 from development_system.model.learning_set_data import LearningDataSet
 from development_system.model.smart_classifier import SmartClassifier
 from development_system.model.smart_classifier_config import SMARTClassifierConfig
 from development_system.utility.json_read_write import JsonReadWrite
 
+# Number of candidate classifiers kept by the grid search
+TOP_CANDIDATES = 5
+
+# Learning sets of the grid search worker, sent once by the pool initializer
+_worker_sets = {}
+
+
+def _init_worker(train_data, validation_data):
+    _worker_sets["training"] = train_data
+    _worker_sets["validation"] = validation_data
+
+
+def _train_configuration(setting, iterations_number, seed):
+    # Trains one hidden layer configuration, the seed makes it deterministic
+    # whatever the worker and the completion order
+    train_data = _worker_sets["training"]
+    validation_data = _worker_sets["validation"]
+
+    smart_classifier = SmartClassifier()
+    smart_classifier.configure(SMARTClassifierConfig(iterations_number, setting, seed))
+    smart_classifier.train_model(train_data["data"], train_data["labels"])
+
+    train_error = smart_classifier.get_error(train_data["data"], train_data["labels"])
+    validation_error = smart_classifier.get_error(validation_data["data"], validation_data["labels"])
+
+    return smart_classifier, train_error, validation_error
+
+
+def _continue_training(setting, iterations_number, seed, smart_classifier):
+    # Trains a configuration for a few more iterations, starting from the weights
+    # of the previous rung of the successive halving
+    train_data = _worker_sets["training"]
+    validation_data = _worker_sets["validation"]
+
+    if smart_classifier is None:
+        smart_classifier = SmartClassifier()
+    smart_classifier.configure(SMARTClassifierConfig(iterations_number, setting, seed, warm_start=True))
+    smart_classifier.train_model(train_data["data"], train_data["labels"])
+
+    train_error = smart_classifier.get_error(train_data["data"], train_data["labels"])
+    validation_error = smart_classifier.get_error(validation_data["data"], validation_data["labels"])
+    return smart_classifier, train_error, validation_error
+
 
 class ValidationManager:
     def __init__(self):
@@ -19,6 +63,11 @@ class ValidationManager:
         self._train_data = LearningDataSet.get_data("training")
         self._validation_data = LearningDataSet.get_data("validation")
         self._candidate_classifiers = []
+        self._parallel_workers = 0
+        self._random_seed = 0
+        self._search_mode = "grid"
+        self._halving = {}
+        self._spill_bytes = 64 * 1024 * 1024
 
         env_path = Path(__file__).resolve().parents[2] / "dev_sys.env"
         load_dotenv(env_path)
@@ -52,6 +101,12 @@ class ValidationManager:
         min_exp = int(math.log2(hidden_neuron_range[0]))  # 4   -> 2
         neuron_options = [2 ** i for i in range(max_exp, min_exp - 1, -1)]
 
+        self._parallel_workers = file_content.get("parallel_workers", 0)
+        self._random_seed = file_content.get("random_seed", 0)
+        self._search_mode = file_content.get("search_mode", "grid")
+        self._halving = file_content.get("halving", {})
+        self._spill_bytes = file_content.get("candidate_spill_mb", 64) * 1024 * 1024
+
         hidden_layer_sizes_options = []
 
         for n_layers in range(hidden_layer_size_range[0], hidden_layer_size_range[1] + 1):
@@ -77,32 +132,24 @@ class ValidationManager:
             print("[WARN] No hyperparameter settings generated, skipping validation.")
             return
 
-        counter = 0
+        # The hyper params file is updated once, the workers only configure their classifier
+        self._smart_classifier.update_classifier_config(
+            SMARTClassifierConfig(iterations_number, grid_search_result[0])
+        )
 
-        for index, setting in enumerate(grid_search_result):
-            new_config = SMARTClassifierConfig(iterations_number, setting)
+        # Top candidates in memory, ranked on the validation error with ties broken on the index.
+        # Only the final top is written to CANDIDATE_CLASSIFIERS_DIRECTORY
+        store = CandidateStore(self._smart_classifier, TOP_CANDIDATES, self._spill_bytes)
+        if self._search_mode == "halving":
+            results = self._successive_halving(grid_search_result, iterations_number)
+        else:
+            results = self._train_configurations(grid_search_result, iterations_number)
 
-            self._smart_classifier.update_classifier_config(new_config)
-
-            self._smart_classifier.train_model(self._train_data["data"], self._train_data["labels"])
-
-            train_error = self._smart_classifier.get_error(
-                self._train_data["data"],
-                self._train_data["labels"]
-            )
-
-            validation_error = self._smart_classifier.get_error(
-                self._validation_data["data"],
-                self._validation_data["labels"]
-            )
+        for index, setting, smart_classifier, train_error, validation_error in results:
 
             #if (validation_error - train_error) > overfitting_threshold:
             #    continue
 
-            counter = counter + 1
-
-            self._smart_classifier.save_classifier("NN" + str(index))
-
             neurons = sum(setting)
 
             model = {
@@ -116,15 +163,15 @@ class ValidationManager:
                 "overfitting_threshold": overfitting_threshold
             }
 
-            self._candidate_classifiers.append(model)
-            self._candidate_classifiers = sorted(
-                self._candidate_classifiers,
-                key=itemgetter('validation_error')
-            )
-
             # A check that the top classifiers selected are not more than FIVE
-            if len(self._candidate_classifiers) > 5:
-                self._candidate_classifiers.pop(5)
+            store.add(validation_error, index, model, smart_classifier)
+
+        store.persist()
+        if store.get_spilled():
+            print(f"[INFO] {store.get_spilled()} candidate classifiers spilled to disk")
+
+        self._candidate_classifiers = store.get_models()
+        counter = len(self._candidate_classifiers)
 
         if counter == 0:
             raise ValueError("[ERROR] Totally overfitting")
@@ -135,6 +182,80 @@ class ValidationManager:
 
         return self._candidate_classifiers
 
+    def _run_tasks(self, function, tasks):
+        # Runs function(*args) for every key -> args of tasks on the process pool,
+        # yields (key, result) as soon as each task completes
+        workers = self._parallel_workers or os.cpu_count() or 1
+        workers = min(workers, len(tasks))
+
+        if workers <= 1:
+            _init_worker(self._train_data, self._validation_data)
+            for key, args in tasks.items():
+                yield key, function(*args)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self._train_data, self._validation_data)) as executor:
+            futures = {executor.submit(function, *args): key for key, args in tasks.items()}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _train_configurations(self, grid_search_result, iterations_number):
+        # Yields (index, setting, classifier, train error, validation error) as soon as
+        # each configuration is trained
+        tasks = {
+            index: (setting, iterations_number, self._random_seed + index)
+            for index, setting in enumerate(grid_search_result)
+        }
+        for done, (index, result) in enumerate(self._run_tasks(_train_configuration, tasks), start=1):
+            setting = grid_search_result[index]
+            print(f"[INFO] Configuration {done}/{len(tasks)} trained: {setting}")
+            yield (index, setting) + result
+
+    def _successive_halving(self, grid_search_result, iterations_number):
+        # Trains every configuration for min_iterations, keeps the best 1/reduction_factor
+        # (never less than the top candidates) and multiplies their budget by reduction_factor,
+        # until the survivors are trained for iterations_number.
+        # Yields (index, setting, classifier, train error, validation error) of the survivors
+        # max_iter must be at least 1
+        min_iterations = max(1, self._halving.get("min_iterations", 1))
+        reduction_factor = max(2, self._halving.get("reduction_factor", 3))
+
+        survivors = {index: None for index in range(len(grid_search_result))}
+        budget = min(min_iterations, iterations_number)
+        trained = 0
+        total_iterations = 0
+
+        while True:
+            # Warm start, only the iterations missing to the new budget are run
+            tasks = {
+                index: (grid_search_result[index], budget - trained, self._random_seed + index, classifier)
+                for index, classifier in survivors.items()
+            }
+            results = dict(self._run_tasks(_continue_training, tasks))
+            total_iterations += len(tasks) * (budget - trained)
+            trained = budget
+            print(f"[INFO] {len(tasks)} configurations trained for {budget} iterations")
+
+            if budget >= iterations_number:
+                break
+
+            # Lowest validation error first, ties broken on the index, as in the CandidateStore
+            ranking = sorted(results, key=lambda index: (results[index][2], index))
+            kept = max(TOP_CANDIDATES, math.ceil(len(ranking) / reduction_factor))
+            survivors = {index: results[index][0] for index in ranking[:kept]}
+            # Nothing left to discard, the survivors go straight to the full budget
+            if kept <= TOP_CANDIDATES:
+                budget = iterations_number
+            else:
+                budget = min(budget * reduction_factor, iterations_number)
+
+        print(f"[INFO] Successive halving: {total_iterations} iterations instead of "
+              f"{len(grid_search_result) * iterations_number}")
+
+        for index in sorted(results):
+            yield (index, grid_search_result[index]) + results[index]
+
     def save_top5_classifiers_json(self):
         JsonReadWrite.write_json_file(self.top5_classifiers_path, self._candidate_classifiers)
         print(f"[INFO] Saved top 5 classifier metadata at {self.top5_classifiers_path}")
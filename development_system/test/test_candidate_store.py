@@ -0,0 +1,72 @@
+import sys
+
+sys.path.insert(0, r'../../development_system')
+from development_system.model.candidate_store import CandidateStore
+
+
+class FakeStorage:
+    # records the saved and deleted classifiers in place of the candidates directory
+    def __init__(self):
+        self.saved = {}
+
+    def delete_classifier(self, uuid):
+        del self.saved[uuid]
+
+
+class FakeClassifier:
+    def __init__(self, storage, size):
+        self.storage = storage
+        self.size = size
+
+    def save_classifier(self, uuid):
+        self.storage.saved[uuid] = self
+
+    def memory_size(self):
+        return self.size
+
+
+def add(store, storage, rank, index, size=10):
+    model = {"uuid": f"NN{index}"}
+    return store.add(rank, index, model, FakeClassifier(storage, size))
+
+
+def test_keeps_top_candidates():
+    storage = FakeStorage()
+    store = CandidateStore(storage, capacity=3)
+    for index, rank in enumerate([0.5, 0.1, 0.4, 0.3, 0.2]):
+        add(store, storage, rank, index)
+    assert not add(store, storage, 0.9, 5)
+
+    assert [model["uuid"] for model in store.get_models()] == ["NN1", "NN4", "NN3"]
+    assert storage.saved == {}
+
+    store.persist()
+    assert sorted(storage.saved) == ["NN1", "NN3", "NN4"]
+
+
+def test_ties_broken_on_index():
+    storage = FakeStorage()
+    store = CandidateStore(storage, capacity=2)
+    add(store, storage, 0.1, 3)
+    add(store, storage, 0.1, 1)
+    assert add(store, storage, 0.1, 2)
+    assert [model["uuid"] for model in store.get_models()] == ["NN1", "NN2"]
+
+
+def test_spills_worst_candidates_and_deletes_evicted():
+    storage = FakeStorage()
+    store = CandidateStore(storage, capacity=3, spill_bytes=25)
+    add(store, storage, 0.3, 0)
+    add(store, storage, 0.2, 1)
+    add(store, storage, 0.1, 2)
+    # 30 bytes in memory, the worst one is written to disk
+    assert store.get_spilled() == 1
+    assert list(storage.saved) == ["NN0"]
+
+    # the spilled candidate leaves the top, its file is deleted
+    add(store, storage, 0.05, 3)
+    assert "NN0" not in storage.saved
+
+    store.persist()
+    assert sorted(storage.saved) == ["NN1", "NN2", "NN3"]
+    assert [model["uuid"] for model in store.get_models()] == ["NN3", "NN2", "NN1"]
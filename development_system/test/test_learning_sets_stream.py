@@ -0,0 +1,84 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, r'../../development_system')
+from development_system.model import communication_manager
+from development_system.model.communication_manager import CommunicationManager
+from development_system.model.learning_set_data import LearningDataSet, LearningDataSetBuilder
+
+
+def session(category, value, label):
+    return {"set": category, "features": [value] * 6, "label": label}
+
+
+SESSIONS = [session("training", float(i), i % 3) for i in range(10)] + \
+           [session("validation", 100.0 + i, 1) for i in range(3)] + \
+           [session("test", 200.0, 2)]
+
+
+def ndjson(sessions):
+    return "".join(json.dumps(s) + "\n" for s in sessions).encode()
+
+
+def test_builder_equals_to_arrays(monkeypatch):
+    # blocks of 4 rows, the last block is partial
+    monkeypatch.setattr(LearningDataSetBuilder, "BLOCK_ROWS", 4)
+    builder = LearningDataSetBuilder()
+    for line in ndjson(SESSIONS).splitlines():
+        builder.add_line(line)
+    learning_sets = builder.build()
+
+    for category in ["training", "validation", "test"]:
+        expected = LearningDataSet.to_arrays([s for s in SESSIONS if s["set"] == category])
+        assert learning_sets[category]["data"].dtype == np.float64
+        np.testing.assert_array_equal(learning_sets[category]["data"], expected["data"])
+        np.testing.assert_array_equal(learning_sets[category]["labels"], expected["labels"])
+
+
+def test_labels_keep_class_names():
+    # the classifier trained on them is deployed, its predictions must be the class names
+    records = [session("training", 1.0, "none"), session("training", 2.0, "overheating")]
+    builder = LearningDataSetBuilder()
+    for line in ndjson(records).splitlines():
+        builder.add_line(line)
+
+    assert builder.build()["training"]["labels"].tolist() == ["none", "overheating"]
+    assert LearningDataSet.to_arrays(records)["labels"].tolist() == ["none", "overheating"]
+
+
+def test_builder_empty_set():
+    builder = LearningDataSetBuilder()
+    builder.add_line(json.dumps(session("training", 1.0, 0)))
+    assert builder.build()["test"]["data"].shape == (0, 6)
+
+
+@pytest.mark.parametrize("line", [
+    json.dumps(session("other", 1.0, 0)),
+    json.dumps({"set": "training", "features": [1.0], "label": 0}),
+    "{not json"
+])
+def test_builder_rejects_malformed_line(line):
+    with pytest.raises(ValueError):
+        LearningDataSetBuilder().add_line(line)
+
+
+def test_stream_endpoint(monkeypatch):
+    # lines cut across the read blocks, no trailing newline
+    monkeypatch.setattr(communication_manager, "STREAM_BLOCK_BYTES", 7)
+    manager = CommunicationManager.get_instance()
+    client = manager.get_app().test_client()
+
+    response = client.post("/learning_sets/stream", data=ndjson(SESSIONS).rstrip(b"\n"),
+                           content_type="application/x-ndjson")
+    assert response.status_code == 200
+    learning_sets = manager.get_queue().get_nowait()
+    assert learning_sets["training"]["data"].shape == (10, 6)
+    np.testing.assert_array_equal(learning_sets["test"]["data"], [[200.0] * 6])
+
+    response = client.post("/learning_sets/stream", data=b'{"set": "training"}\n',
+                           content_type="application/x-ndjson")
+    assert response.status_code == 400
+    assert manager.get_queue().empty()
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, r'../../development_system')
+from development_system.model import validation_manager
+from development_system.model.learning_set_data import LearningDataSet
+from development_system.model.validation_manager import ValidationManager, TOP_CANDIDATES
+
+
+class FakeClassifier:
+
+    def memory_size(self):
+        return 0
+
+    def save_classifier(self, uuid):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # validation error of every configuration is 1 - its number of neurons / 100
+    trainings = []
+
+    def continue_training(setting, iterations_number, seed, smart_classifier):
+        trainings.append((setting, iterations_number))
+        return FakeClassifier(), 0.0, 1 - setting[0] / 100
+
+    monkeypatch.setattr(validation_manager, "_continue_training", continue_training)
+    split = {"data": np.zeros((2, 6)), "labels": np.array([0, 1])}
+    LearningDataSet.set_data({"training": split, "validation": split, "test": split})
+
+    manager = ValidationManager()
+    manager._parallel_workers = 1
+    manager.trainings = trainings
+    return manager
+
+
+def test_halving_keeps_best_configurations(manager):
+    manager._halving = {"min_iterations": 2, "reduction_factor": 2}
+    grid = [(neurons,) for neurons in [7, 3, 12, 1, 9, 4, 11, 2, 8, 6, 10, 5]]
+
+    results = list(manager._successive_halving(grid, 8))
+
+    survivors = [setting for _, setting, _, _, _ in results]
+    assert sorted(survivors, reverse=True) == [(12,), (11,), (10,), (9,), (8,)]
+    assert len(survivors) == TOP_CANDIDATES
+    # every survivor reached the full budget
+    budgets = {}
+    for setting, iterations in manager.trainings:
+        budgets[setting] = budgets.get(setting, 0) + iterations
+    assert all(budgets[setting] == 8 for setting in survivors)
+    assert budgets[(1,)] == 2
+
+
+def test_halving_min_iterations_at_least_one(manager):
+    manager._halving = {"min_iterations": 0, "reduction_factor": 3}
+    grid = [(neurons,) for neurons in range(1, 13)]
+
+    results = list(manager._successive_halving(grid, 3))
+
+    assert all(iterations >= 1 for _, iterations in manager.trainings)
+    assert (12,) in [setting for _, setting, _, _, _ in results]
+
+
+def test_top_candidates_have_lowest_error(manager, monkeypatch):
+    # 6 configurations reach the full budget, the 5 with the lowest error are kept
+    grid = [(neurons,) for neurons in [7, 3, 12, 1, 9, 4, 11, 2, 8, 6, 10, 5]]
+    manager._search_mode = "halving"
+    manager._halving = {"min_iterations": 4, "reduction_factor": 2}
+    monkeypatch.setattr(manager, "generate_hyperparameter_options", lambda: (grid, 8, 0.1))
+    monkeypatch.setattr(manager._smart_classifier, "update_classifier_config", lambda config: None)
+    monkeypatch.setattr(manager, "save_top5_classifiers_json", lambda: None)
+
+    candidates = manager.get_candidate_classifiers()
+
+    full_budget = [setting for setting, iterations in manager.trainings if iterations == 4][12:]
+    assert len(full_budget) == 6
+    assert [model["hidden_layers_structure"] for model in candidates] == [(12,), (11,), (10,), (9,), (8,)]
+    assert [model["uuid"] for model in candidates] == ["NN2", "NN6", "NN10", "NN4", "NN8"]
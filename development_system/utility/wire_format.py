@@ -0,0 +1,44 @@
+""" Module for the decoding of the messages, MessagePack or JSON """
+from flask import Request
+from werkzeug.exceptions import UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:
+    # optional, messages are sent and accepted as JSON only
+    msgpack = None
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+class WireRequest(Request):
+    """
+    Flask request whose json also decodes MessagePack bodies, selected by the Content-Type
+    """
+
+    _msgpack_body = None
+
+    def get_json(self, force=False, silent=False, cache=True):
+        """
+        Gets the decoded body, JSON unless the Content-Type is MessagePack
+        :param force: bool
+        :param silent: bool
+        :param cache: bool
+        :return: Any
+        """
+        if self.mimetype != MSGPACK_MIMETYPE:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack not supported")
+
+        body = self._msgpack_body
+        if body is None:
+            try:
+                body = msgpack.unpackb(self.get_data(cache=cache), raw=False)
+            except (ValueError, msgpack.UnpackException) as e:
+                if silent:
+                    return None
+                return self.on_json_loading_failed(e)
+            if cache:
+                self._msgpack_body = body
+        return body
@@ -5,6 +5,7 @@ from threading import Thread
 import jsonschema
 
 from evaluation_system.model.label import Label
+from evaluation_system.model.label_source import LabelSource
 from evaluation_system.messaging.msg_json import MessagingJsonController
 from evaluation_system.repository.database_manager import DatabaseManager
 from evaluation_system.reporting.evaluation_report_controller import EvaluationReportController
@@ -93,7 +94,7 @@ class EvaluationSystem:
         while True:
 
             # Receive JSON
-            received_label_json, label_source = self._msg_controller.receive()
+            received_label_json, label_source, shadow_model = self._msg_controller.receive()
 
             try:
                 # Convert to Label Object
@@ -103,6 +104,11 @@ class EvaluationSystem:
                       f" | {str(label_source):<12} " +
                       f"| {label.get_uuid()}]")
 
+                # Shadow classifiers are only compared in the report
+                if label_source == LabelSource.SHADOW:
+                    self._database_manager.store_shadow_label(label, shadow_model)
+                    continue
+
                 # Add to database
                 self._database_manager.store_label(label, label_source)
 
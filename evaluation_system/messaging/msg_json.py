@@ -4,6 +4,7 @@ import json
 import queue
 from datetime import datetime
 from flask import Flask, request
+from evaluation_system.messaging.wire_format import WireRequest
 from evaluation_system.model.label_source import LabelSource
 
 
@@ -15,6 +16,8 @@ class MessagingJsonController:
         """ Constructor """
         # Flask instance to receive data
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
         # a thread-safe queue to buffer the received json message
         self._msg_to_controller_queue = queue.Queue()
 
@@ -104,7 +107,7 @@ def receive_classifier_label():
     received_label = request.json
 
     # Add source info
-    label_data = (received_label, LabelSource.CLASSIFIER)
+    label_data = (received_label, LabelSource.CLASSIFIER, None)
 
     # Put into queue
     MessagingJsonController.get_instance().put_object_into_queue(label_data)
@@ -121,10 +124,28 @@ def receive_expert_label():
     received_label = request.json
 
     # Add source info
-    label_data = (received_label, LabelSource.EXPERT)
+    label_data = (received_label, LabelSource.EXPERT, None)
 
     # Put into queue
     MessagingJsonController.get_instance().put_object_into_queue(label_data)
 
     # Return ok
     return {}, 200
+
+
+@app.post("/label/shadow/<model>")
+def receive_shadow_labels(model):
+    """ Receive labels of a shadow classifier, a single label or a list """
+
+    # Extract JSON payload
+    received_labels = request.json
+    if not isinstance(received_labels, list):
+        received_labels = [received_labels]
+
+    # Add source and model info, then put into queue
+    for received_label in received_labels:
+        label_data = (received_label, LabelSource.SHADOW, model)
+        MessagingJsonController.get_instance().put_object_into_queue(label_data)
+
+    # Return ok
+    return {}, 200
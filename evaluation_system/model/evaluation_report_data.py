@@ -13,6 +13,7 @@ class EvaluationReportData:
         self._consecutive_errors_max = None
         self._errors_threshold_satisfied = None
         self._consecutive_errors_threshold_satisfied = None
+        self._shadow_models = {}
 
     def to_dict(self):
         """ Convert the evaluation report data to a dictionary """
@@ -31,7 +32,8 @@ class EvaluationReportData:
             "consecutive_errors_max": self.get_consecutive_errors_max(),
             "errors_threshold_satisfied": self.get_errors_threshold_satisfied(),
             "consecutive_errors_threshold_satisfied":
-                self.get_consecutive_errors_threshold_satisfied()
+                self.get_consecutive_errors_threshold_satisfied(),
+            "shadow_models": self.get_shadow_models()
         }
 
     def get_label_pairs(self) -> List[LabelPair]:
@@ -89,3 +91,11 @@ class EvaluationReportData:
     def set_consecutive_errors_threshold_satisfied(self, value: bool):
         """Sets consecutive errors threshold satisfied"""
         self._consecutive_errors_threshold_satisfied = value
+
+    def get_shadow_models(self) -> dict:
+        """Gets the errors of the shadow classifiers, by model"""
+        return self._shadow_models
+
+    def set_shadow_models(self, value: dict):
+        """Sets the errors of the shadow classifiers, by model"""
+        self._shadow_models = value
@@ -1,6 +1,7 @@
 """ Module for defining labels """
 import jsonschema
 from evaluation_system.model.label_type import LabelType
+from evaluation_system.model.schema_validator import compile_validator, validate
 
 
 class Label:
@@ -26,7 +27,7 @@ class Label:
 
         # Schema validation
         try:
-            jsonschema.validate(instance=data, schema=Label.RECEIVED_LABEL_SCHEMA)
+            validate(_RECEIVED_LABEL_VALIDATOR, data)
         except jsonschema.exceptions.ValidationError as exc:
             raise jsonschema.exceptions.ValidationError(
                 f"Invalid Label JSON \
@@ -53,3 +54,6 @@ class Label:
     def get_uuid(self):
         """ Returns the UUID """
         return self._uuid
+
+
+_RECEIVED_LABEL_VALIDATOR = compile_validator(Label.RECEIVED_LABEL_SCHEMA)
@@ -5,6 +5,7 @@ class LabelSource(enum.Enum):
     """ Class for defining label source """
     CLASSIFIER  = 1
     EXPERT      = 2
+    SHADOW      = 3
 
     def __str__(self):
         """ Returns the string representation """
@@ -0,0 +1,16 @@
+""" Module for validating JSON messages against precompiled schemas """
+import jsonschema
+
+
+def compile_validator(schema):
+    """ Builds the validator of a schema once, the schema itself is checked only here """
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def validate(validator, data):
+    """ Same as jsonschema.validate, without checking the schema and building the validator again """
+    error = jsonschema.exceptions.best_match(validator.iter_errors(data))
+    if error is not None:
+        raise error
@@ -107,9 +107,17 @@ class EvaluationReportController:
         evaluation_report_data.set_consecutive_errors(cons_err)
         evaluation_report_data.set_consecutive_errors_threshold_satisfied(err <= ce_max)
 
+        # Shadow classifiers on the same sessions
+        shadow_errors = self._database_manager.get_shadow_errors(
+            [pair.get_uuid() for pair in current_pairs])
+        evaluation_report_data.set_shadow_models({
+            model: {"labels": count, "errors": errors}
+            for model, (count, errors) in shadow_errors.items()
+        })
+
         self._current_report = evaluation_report_data
 
-        # Delete used labels
+        # Delete used labels (shadow ones included)
         self._database_manager.delete_label_pairs(current_pairs)
 
     def save_report(self):
@@ -149,6 +157,11 @@ class EvaluationReportController:
         print(f" Maximum: {data['consecutive_errors_max']}")
         print(f" Threshold satisfied: {data['consecutive_errors_threshold_satisfied']}")
 
+        if data['shadow_models']:
+            print(" === Shadow classifiers (errors / labels):")
+            for model, result in data['shadow_models'].items():
+                print(f" - {model}: {result['errors']} / {result['labels']}")
+
         print(" ====== Evaluation Report end ======")
 
     @staticmethod
@@ -54,11 +54,18 @@ class DatabaseManager:
                 "(UUID TEXT PRIMARY KEY UNIQUE, label_classifier TEXT, label_expert TEXT)"
         self._run_query(query)
 
+        query = "CREATE TABLE if not exists shadow_labels" \
+                "(UUID TEXT, model TEXT, label TEXT, PRIMARY KEY (UUID, model))"
+        self._run_query(query)
+
     def clear_tables(self):
         """ Clears the tables """
         query = "DROP TABLE IF EXISTS labels;"
         self._run_query(query)
 
+        query = "DROP TABLE IF EXISTS shadow_labels;"
+        self._run_query(query)
+
     # Read operation
 
     def get_label_pairs(self, limit: int):
@@ -97,6 +104,25 @@ class DatabaseManager:
         rows = cursor.fetchall()
         return rows[0][0]
 
+    def get_shadow_errors(self, uuids: list):
+        """
+        Compares the shadow labels of the given UUIDs with the expert ones.
+        Returns model -> (compared labels, errors)
+        """
+        if not uuids:
+            return {}
+
+        placeholders = ",".join(["?"] * len(uuids))
+        query = f"  SELECT shadow_labels.model, COUNT(*), \
+                        SUM(shadow_labels.label != labels.label_expert) \
+                    FROM shadow_labels JOIN labels ON shadow_labels.UUID = labels.UUID \
+                    WHERE labels.label_expert IS NOT NULL \
+                        AND shadow_labels.UUID IN ({placeholders}) \
+                    GROUP BY shadow_labels.model"
+        cursor = self._run_query(query, tuple(uuids))
+
+        return {model: (count, errors) for model, count, errors in cursor.fetchall()}
+
     def get_count_all(self):
         """ Returns the number of complete labels """
         query = "   SELECT COUNT(*) \
@@ -139,6 +165,15 @@ class DatabaseManager:
 
         self._run_query(query, label_data)
 
+    def store_shadow_label(self, label: Label, model: str):
+        """ Stores the label of a shadow classifier, the first one received is kept """
+
+        query = """
+            INSERT OR IGNORE INTO shadow_labels (UUID, model, label)
+            VALUES (?, ?, ?);
+        """
+        self._run_query(query, (label.get_uuid(), model, str(label.get_label_type())))
+
     def store_label_json(self, label_json, label_source: LabelSource):
         """ Stores a label passed as json """
 
@@ -165,3 +200,7 @@ class DatabaseManager:
         query = f"DELETE FROM labels WHERE UUID IN ({placeholders});"
 
         self._run_query(query, tuple(uuids))
+
+        query = f"DELETE FROM shadow_labels WHERE UUID IN ({placeholders});"
+
+        self._run_query(query, tuple(uuids))
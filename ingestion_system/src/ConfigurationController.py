@@ -149,5 +149,82 @@ class ConfigurationController:
         """
         return self.current_config["evaluationSessions"]
 
+    def get_records_buffer_config(self) -> dict:
+        """
+        Gets the records buffer configuration, missing fields fall back to the legacy behaviour
+        (SQLite backend, a new connection and a commit for every record)
+        :return: dict
+        """
+        config = {
+            "backend": "sqlite",
+            "ringCapacity": 1024,
+            "journalPath": None,
+            "journalFsync": False,
+            "persistentConnection": False,
+            "batchSize": 1,
+            "flushPeriodSeconds": 0.0
+        }
+        config.update(self.current_config.get("recordsBuffer", {}))
+        return config
+
+    def get_concurrent_collection_config(self) -> dict:
+        """
+        Gets the concurrent collection configuration, disabled if missing.
+        Clients without a polling period use recordsCollectionPeriodSeconds
+        :return: dict
+        """
+        config = {
+            "enabled": False,
+            "queueSize": 300,
+            "sessionWindowSeconds": 0.0,
+            "pollingPeriodsSeconds": {}
+        }
+        config.update(self.current_config.get("concurrentCollection", {}))
+        return config
+
+    def get_dispatcher_config(self) -> dict:
+        """
+        Gets the outbound dispatcher configuration, disabled (inline sending) if missing
+        :return: dict
+        """
+        config = {
+            "enabled": False,
+            "workers": 1,
+            "maxInFlight": 8,
+            "maxRetries": 3,
+            "backoffSeconds": 0.5,
+            "statsPeriodSessions": 100,
+            "batchSize": 1,
+            "batchEndpoint": "raw_sessions"
+        }
+        config.update(self.current_config.get("dispatcher", {}))
+        return config
+
+    def get_http_pool_config(self) -> dict:
+        """
+        Gets the sizes of the HTTP connection pools
+        :return: dict
+        """
+        config = {
+            "poolConnections": 4,
+            "poolMaxsize": 8
+        }
+        config.update(self.current_config.get("httpPool", {}))
+        return config
+
+    def get_wire_format(self) -> str:
+        """
+        Gets the encoding of the outgoing messages, "msgpack" or "json" (default)
+        :return: str
+        """
+        return self.current_config.get("wireFormat", "json")
+
+    def get_raw_session_layout(self) -> str:
+        """
+        Gets the layout of the raw sessions sent, "rows" (default) or "columnar"
+        :return: str
+        """
+        return self.current_config.get("rawSessionLayout", "rows")
+
     def is_test(self):
         return self.current_config["test"]
\ No newline at end of file
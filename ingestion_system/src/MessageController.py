@@ -4,11 +4,33 @@ import sys
 import threading
 from threading import Thread
 from flask import Flask, request
-from requests import post, exceptions
+from requests import exceptions
 
+from ingestion_system.src.WireFormat import WireFormat, WireRequest
 from ingestion_system.src.messages import Message
+from ingestion_system.src.messages.RawSessionBatchMessage import RawSessionBatchMessage
 from ingestion_system.src.messages.RawSessionMessage import RawSessionMessage
 
+SENT = "sent"
+"""
+The message was accepted by the destination
+"""
+
+RETRYABLE = "retryable"
+"""
+The message did not reach the destination, it can be sent again
+"""
+
+REJECTED = "rejected"
+"""
+The message was refused or its outcome is unknown, sending it again could duplicate it
+"""
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+"""
+Status codes answered before the message is processed
+"""
+
 
 class MessageController:
     """
@@ -20,6 +42,8 @@ class MessageController:
     def __init__(self):
         # Flask instance to receive data
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
         # a thread-safe queue to buffer the received json message
         self._received_json_queue = queue.Queue()
         self.test_data = {}
@@ -65,26 +89,49 @@ class MessageController:
         :param endpoint: str
         :return: boolean
         """
+        return self.deliver(message, endpoint) == SENT
+
+    def deliver(self, message: Message, endpoint) -> str:
+        """
+        Sends a message to an endpoint using the address in the message.
+        Returns SENT, RETRYABLE if the destination surely did not take the message, REJECTED otherwise
+        :param message: Message
+        :param endpoint: str
+        :return: str
+        """
         url = f'http://{message.dst_address}:{message.dst_port}/' + endpoint
         response = None
         try:
-            response = post(url, json=message.to_dict(), timeout=10.0)
+            response = WireFormat.get_instance().post(url, message.to_dict(), timeout=10.0)
+        except exceptions.ConnectionError:
+            print("Endpoint system unreachable")
+            return RETRYABLE
         except exceptions.RequestException:
+            # e.g. read timeout, the destination may have taken the message
             print("Endpoint system unreachable")
-            return False
+            return REJECTED
 
         if response.status_code != 200:
-            res = response.json()
             error_message = 'unknown'
-            if 'error' in res:
-                error_message = res['error']
+            try:
+                res = response.json()
+                if 'error' in res:
+                    error_message = res['error']
+            except ValueError:
+                # e.g. a 503 page from a proxy
+                pass
             print(f'Sending Error: {error_message}')
-            return False
+            return RETRYABLE if response.status_code in RETRYABLE_STATUS_CODES else REJECTED
 
         if isinstance(message, RawSessionMessage):
             with self.test_data_lock:
                 self.test_data[message.raw_session.uuid] = datetime.datetime.now()
-        return True
+        elif isinstance(message, RawSessionBatchMessage):
+            now = datetime.datetime.now()
+            with self.test_data_lock:
+                for raw_session in message.raw_sessions:
+                    self.test_data[raw_session.uuid] = now
+        return SENT
 
 
 app = MessageController.get_instance().get_app()
@@ -0,0 +1,215 @@
+import queue
+import threading
+import time
+
+from ingestion_system.src.MessageController import RETRYABLE, SENT
+from ingestion_system.src.messages.Message import Message
+from ingestion_system.src.messages.RawSessionBatchMessage import RawSessionBatchMessage
+from ingestion_system.src.messages.RawSessionMessage import RawSessionMessage
+
+
+class MessageDispatcher:
+    """
+    Sends messages from background workers, so that the records collection never waits for the network.
+    With a single worker the messages are delivered in submission order.
+    Raw sessions queued towards the same destination can be coalesced and sent to the batch endpoint.
+    """
+
+    workers: int
+    """
+    Number of sender threads
+    """
+
+    max_in_flight: int
+    """
+    Maximum number of messages queued or being sent, submit blocks beyond it
+    """
+
+    max_retries: int
+    """
+    Number of retries after a send that did not reach the destination
+    """
+
+    backoff_seconds: float
+    """
+    Wait before the first retry, doubled at every retry
+    """
+
+    batch_size: int
+    """
+    Maximum number of queued raw sessions sent in a single message, 1 disables batching
+    """
+
+    batch_endpoint: str
+    """
+    Endpoint accepting an array of raw sessions
+    """
+
+    def __init__(self, message_controller, workers: int = 1, max_in_flight: int = 8,
+                 max_retries: int = 3, backoff_seconds: float = 0.5,
+                 batch_size: int = 1, batch_endpoint: str = "raw_sessions"):
+        """
+        Constructor
+        :param message_controller: MessageController
+        :param workers: int
+        :param max_in_flight: int
+        :param max_retries: int
+        :param backoff_seconds: float
+        :param batch_size: int
+        :param batch_endpoint: str
+        """
+        self.message_controller = message_controller
+        self.workers = max(1, workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.batch_size = max(1, batch_size)
+        self.batch_endpoint = batch_endpoint
+        self._queue = queue.Queue()
+        self._window = threading.BoundedSemaphore(self.max_in_flight)
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._sent = 0
+        self._failed = 0
+        self._retries = 0
+        self._total_send_seconds = 0.0
+        self._max_send_seconds = 0.0
+        self._total_wait_seconds = 0.0
+
+    def start(self):
+        """
+        Starts the sender threads
+        :return: None
+        """
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"dispatcher-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Waits for the queued messages to be sent and stops the sender threads
+        :return: None
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, message: Message, endpoint: str, error_message: str, on_delivered=None):
+        """
+        Queues a message for sending, blocks while the in-flight window is full
+        :param message: Message
+        :param endpoint: str
+        :param error_message: str printed if the message cannot be delivered
+        :param on_delivered: callable called from a sender thread with True if the message was sent
+        :return: None
+        """
+        self._window.acquire()
+        self._queue.put((message, endpoint, error_message, time.perf_counter(), on_delivered))
+
+    def _work(self):
+        """
+        Sender loop
+        :return: None
+        """
+        # item taken from the queue while coalescing that does not fit the batch
+        held = []
+        while True:
+            item = held.pop() if held else self._queue.get()
+            if item is None:
+                return
+            items = [item]
+            if self.batch_size > 1 and isinstance(item[0], RawSessionMessage):
+                held = self._coalesce(items)
+            result = False
+            try:
+                if len(items) == 1:
+                    message, endpoint, error_message, submitted, _ = item
+                else:
+                    message = RawSessionBatchMessage()
+                    message.dst_address = item[0].dst_address
+                    message.dst_port = item[0].dst_port
+                    message.raw_sessions = [queued[0].raw_session for queued in items]
+                    endpoint = self.batch_endpoint
+                    error_message = item[2]
+                    submitted = item[3]
+                result = self._deliver(message, endpoint, error_message, submitted, len(items))
+            finally:
+                for queued in items:
+                    self._window.release()
+                    if queued[4] is not None:
+                        queued[4](result)
+
+    def _coalesce(self, items: list) -> list:
+        """
+        Appends to items the raw sessions already queued towards the same destination, up to batch_size.
+        Returns the queued item that cannot be part of the batch, if any
+        :param items: list
+        :return: list
+        """
+        first = items[0][0]
+        while len(items) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return []
+            if item is None or not isinstance(item[0], RawSessionMessage) \
+                    or item[0].dst_address != first.dst_address or item[0].dst_port != first.dst_port:
+                return [item]
+            items.append(item)
+        return []
+
+    def _deliver(self, message: Message, endpoint: str, error_message: str, submitted: float, count: int = 1):
+        """
+        Sends a message, retrying with exponential backoff while it surely did not reach the destination
+        :param message: Message
+        :param endpoint: str
+        :param error_message: str
+        :param submitted: float
+        :param count: int number of submitted messages carried by the message
+        :return: bool True if the message was sent
+        """
+        started = time.perf_counter()
+        outcome = RETRYABLE
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                with self._stats_lock:
+                    self._retries += 1
+                time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+            outcome = self.message_controller.deliver(message, endpoint)
+            # a message the destination may have taken is never sent again, it would be duplicated
+            if outcome != RETRYABLE:
+                break
+        result = outcome == SENT
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            self._total_wait_seconds += (started - submitted) * count
+            if result:
+                self._sent += count
+                self._total_send_seconds += elapsed * count
+                self._max_send_seconds = max(self._max_send_seconds, elapsed)
+            else:
+                self._failed += count
+        if not result:
+            print(error_message)
+        return result
+
+    def get_stats(self) -> dict:
+        """
+        Gets queue depth, counters and send latency (seconds, retries included)
+        :return: dict
+        """
+        with self._stats_lock:
+            completed = self._sent + self._failed
+            return {
+                "queue_depth": self._queue.qsize(),
+                "sent": self._sent,
+                "failed": self._failed,
+                "retries": self._retries,
+                "avg_send_latency": self._total_send_seconds / self._sent if self._sent else 0.0,
+                "max_send_latency": self._max_send_seconds,
+                "avg_queue_wait": self._total_wait_seconds / completed if completed else 0.0
+            }
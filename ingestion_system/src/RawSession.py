@@ -1,9 +1,36 @@
+import numpy as np
+
+from ingestion_system.src.buffer_backends.BufferBackend import INTEGER_COLUMNS
 from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
 from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
 from ingestion_system.src.records.ExpertRecord import ExpertRecord
 from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
 
 
+def _column_to_list(column: np.ndarray, integer: bool = False) -> list:
+    values = column.tolist()
+    if column.dtype.kind == "f":
+        # NaN marks a missing sample
+        cast = int if integer else float
+        values = [None if v != v else cast(v) for v in values]
+    return values
+
+
+def _columns_to_lists(sensor: str, columns: dict) -> dict:
+    return {name: _column_to_list(column, name in INTEGER_COLUMNS[sensor]) for name, column in columns.items()}
+
+
+def _records_to_lists(records: list, names: list) -> dict:
+    rows = [record.to_dict() for record in records]
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def _columns_to_rows(sensor: str, columns: dict) -> list:
+    names = list(columns)
+    values = [_column_to_list(columns[name], name in INTEGER_COLUMNS[sensor]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
 class RawSession:
     """
     Raw session containing the buffered records
@@ -34,6 +61,16 @@ class RawSession:
     label associated to the records, it is different from None only if we are in the evaluation and development phase
     """
 
+    columns: dict
+    """
+    records gathered in column-oriented form, as returned by RecordsBuffer.drain(), used instead of the record lists
+    """
+
+    layout: str
+    """
+    layout of to_dict(): "rows", a list of record dicts per type, or "columnar", a list per field of every type
+    """
+
     def __init__(self):
         """
         Constructor
@@ -43,12 +80,17 @@ class RawSession:
         self.environmental_records = None
         self.occupancy_records = None
         self.expert_record = None
+        self.columns = None
+        self.layout = "rows"
 
     def to_dict(self) -> dict:
         """
         Converts the raw session into a dictionary
         :return: dict
         """
+        if self.layout == "columnar":
+            return self._to_columnar_dict()
+
         ret = {
             "UUID": self.uuid,
             "applianceRecords": [],
@@ -57,6 +99,12 @@ class RawSession:
             "expertRecord": self.expert_record.to_dict()
         }
 
+        if self.columns is not None:
+            ret["applianceRecords"] = _columns_to_rows("appliance", self.columns["appliance"])
+            ret["environmentalRecords"] = _columns_to_rows("environmental", self.columns["environmental"])
+            ret["occupancyRecords"] = _columns_to_rows("occupancy", self.columns["occupancy"])
+            return ret
+
         for record in self.appliance_records:
             ret["applianceRecords"].append(record.to_dict())
         for record in self.environmental_records:
@@ -64,4 +112,28 @@ class RawSession:
         for record in self.occupancy_records:
             ret["occupancyRecords"].append(record.to_dict())
 
-        return ret
\ No newline at end of file
+        return ret
+
+    def _to_columnar_dict(self) -> dict:
+        """
+        Converts the raw session into a dictionary with a list per field:
+        {"UUID", "appliance": {"current": [...], ...}, "environmental": {...}, "occupancy": {...}, "expertRecord"}
+        :return: dict
+        """
+        ret = {
+            "UUID": self.uuid,
+            "expertRecord": self.expert_record.to_dict()
+        }
+
+        if self.columns is not None:
+            for sensor, columns in self.columns.items():
+                ret[sensor] = _columns_to_lists(sensor, columns)
+            return ret
+
+        ret["appliance"] = _records_to_lists(
+            self.appliance_records,
+            ["UUID", "timestamp", "current", "voltage", "temperature", "appliance_type"])
+        ret["environmental"] = _records_to_lists(
+            self.environmental_records, ["UUID", "timestamp", "temperature", "humidity"])
+        ret["occupancy"] = _records_to_lists(self.occupancy_records, ["UUID", "timestamp", "occupancy"])
+        return ret
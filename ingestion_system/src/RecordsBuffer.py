@@ -1,5 +1,5 @@
-import sqlite3
-
+from ingestion_system.src.buffer_backends.BufferBackend import BufferBackend
+from ingestion_system.src.buffer_backends.SqliteBufferBackend import SqliteBufferBackend
 from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
 from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
 from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
@@ -8,198 +8,81 @@ from ingestion_system.src.records.Record import Record
 
 class RecordsBuffer:
     """
-    RecordsBuffer will provide necessary apis between the orchestrator and the records database
+    RecordsBuffer will provide necessary apis between the orchestrator and the records storage
     """
 
-    db_name: str
+    backend: BufferBackend
     """
-    The name of the database file
+    Storage where the records are kept, SQLite by default
     """
 
-    stored_records: int
-    """
-    Number of stored records
-    """
-
-    def __init__(self):
+    def __init__(self, backend: BufferBackend = None):
         """
         Constructor
+        :param backend: BufferBackend
         """
-        self.db_name = "recordsBuffer.db"
-        self.stored_records = -1
-        conn = sqlite3.connect(self.db_name)
-
-        # init database
-        cursor = conn.cursor()
-
-        # appliance record table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ApplianceRecord (
-            uuid INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            current FLOAT,
-            voltage FLOAT,
-            temperature FLOAT,
-            applianceType TEXT
-        )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS EnvironmentalRecord (
-                uuid INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                temperature FLOAT,
-                humidity FLOAT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS OccupancyRecord (
-                uuid INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                occupancy INTEGER
-            )
-        """)
-        conn.commit()
-        conn.close()
-        self.stored_records = self.get_records_count()
+        if backend is None:
+            backend = SqliteBufferBackend()
+        self.backend = backend
 
     def store_record(self, record: Record):
         """
-        Stores the specified record in the database
+        Stores the specified record in the buffer
         :param record: Record
         :return: None
         """
         if isinstance(record, ApplianceRecord):
-            self.store_appliance(record)
+            self.backend.store_appliance(record)
         elif isinstance(record, EnvironmentalRecord):
-            self.store_environmental(record)
+            self.backend.store_environmental(record)
         elif isinstance(record, OccupancyRecord):
-            self.store_occupancy(record)
-        self.stored_records += 1
-
+            self.backend.store_occupancy(record)
 
-    def store_appliance(self, record: ApplianceRecord):
+    def get_records(self) -> dict:
         """
-        Stores the appliance record in the database
-        :param record: ApplianceRecord
-        :return: None
+        Get all buffered records
+        :return: dict
         """
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-        "INSERT INTO ApplianceRecord (timestamp, current, voltage, temperature, applianceType) VALUES (?, ?, ?, ?, ?)",
-    (record.timestamp, record.current, record.voltage, record.temperature, record.appliance_type)
-        )
-        conn.commit()
-        conn.close()
+        return self.backend.get_records()
 
-    def store_environmental(self, record: EnvironmentalRecord):
+    def drain(self) -> dict:
         """
-        Stores the environmental record in the database
-        :param record: EnvironmentalRecord
-        :return: None
+        Atomically gets and deletes all buffered records, column-oriented
+        :return: dict
         """
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO EnvironmentalRecord (timestamp, temperature, humidity) VALUES (?, ?, ?)",
-            (record.timestamp, record.temperature, record.humidity)
-        )
-        conn.commit()
-        conn.close()
+        return self.backend.drain()
 
-    def store_occupancy(self, record: OccupancyRecord):
+    def get_records_count(self) -> int:
         """
-        Stores the occupancy record in the database
-        :param record: OccupancyRecord
-        :return: None
+        Get the number of buffered records
+        :return: int
         """
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO OccupancyRecord (timestamp, occupancy) VALUES (?, ?)",
-            (record.timestamp, record.occupancy)
-        )
-        conn.commit()
-        conn.close()
+        return self.backend.count()
 
-    def get_records(self) -> dict:
+    def get_dropped_count(self) -> int:
         """
-        Get all buffered records
-        :return: dict
+        Get the number of records lost because the buffer was full
+        :return: int
         """
-        ret = {
-            "appliance": [],
-            "environmental": [],
-            "occupancy": []
-        }
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # appliance
-        cursor.execute("SELECT * FROM ApplianceRecord")
-        records = cursor.fetchall()
-        for record in records:
-            appliance = ApplianceRecord()
-            appliance.uuid = record[0]
-            appliance.timestamp = record[1]
-            appliance.current = record[2]
-            appliance.voltage = record[3]
-            appliance.temperature = record[4]
-            appliance.appliance_type = record[5]
-            ret["appliance"].append(appliance)
-
-        # environmental
-        cursor.execute("SELECT * FROM EnvironmentalRecord")
-        records = cursor.fetchall()
-        for record in records:
-            environmental = EnvironmentalRecord()
-            environmental.uuid = record[0]
-            environmental.timestamp = record[1]
-            environmental.temperature = record[2]
-            environmental.humidity = record[3]
-            ret["environmental"].append(environmental)
-
-        # occupancy
-        cursor.execute("SELECT * FROM OccupancyRecord")
-        records = cursor.fetchall()
-        for record in records:
-            occupancy = OccupancyRecord()
-            occupancy.uuid = record[0]
-            occupancy.timestamp = record[1]
-            occupancy.occupancy = record[2]
-            ret["occupancy"].append(occupancy)
-
-        conn.close()
-        return ret
+        return self.backend.get_dropped_count()
 
+    def delete_records(self):
+        """
+        Delete all buffered records
+        :return: None
+        """
+        self.backend.delete_records()
 
-    def get_records_count(self) -> int:
+    def flush(self):
         """
-        Get the number of buffered records
-        :return: int
+        Makes the buffered records durable
+        :return: None
         """
-        if self.stored_records >= 0:
-            return self.stored_records
-        self.stored_records = 0
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM ApplianceRecord")
-        self.stored_records += cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM EnvironmentalRecord")
-        self.stored_records += cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM OccupancyRecord")
-        self.stored_records += cursor.fetchone()[0]
-        return self.stored_records
+        self.backend.flush()
 
-    def delete_records(self):
+    def close(self):
         """
-        Delete all buffered records
+        Releases the buffer storage
         :return: None
         """
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM ApplianceRecord")
-        cursor.execute("DELETE FROM EnvironmentalRecord")
-        cursor.execute("DELETE FROM OccupancyRecord")
-        conn.commit()
-        self.stored_records = 0
+        self.backend.close()
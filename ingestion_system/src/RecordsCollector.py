@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+from ingestion_system.src.records.Record import Record
+
+
+class RecordsCollector:
+    """
+    Polls the client side systems concurrently, each one on its own thread and schedule,
+    and pushes the gathered records into a bounded queue
+    """
+
+    clients: dict
+    """
+    Client side systems to poll, by name
+    """
+
+    periods: dict
+    """
+    Cooldown in seconds between two polls of the same client, by name
+    """
+
+    records_queue: queue.Queue
+    """
+    Bounded queue of the gathered records, pollers block when it is full
+    """
+
+    def __init__(self, clients: dict, periods: dict, queue_size: int):
+        """
+        Constructor
+        :param clients: dict name -> client side system
+        :param periods: dict name -> float
+        :param queue_size: int
+        """
+        self.clients = clients
+        self.periods = periods
+        self.records_queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """
+        Starts a polling thread for every client
+        :return: None
+        """
+        self._stop_event.clear()
+        for name, client in self.clients.items():
+            thread = threading.Thread(target=self._poll, args=(client, self.periods.get(name, 0.0)),
+                                      name=f"{name}-poller", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stops the polling threads
+        :return: None
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _poll(self, client, period: float):
+        """
+        Polling loop of a single client
+        :param client: client side system
+        :param period: float
+        :return: None
+        """
+        while not self._stop_event.is_set():
+            record = client.get_record()
+            while not self._stop_event.is_set():
+                try:
+                    self.records_queue.put(record, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if period > 0:
+                self._stop_event.wait(period)
+
+    def get_record(self, timeout: float = None) -> Record:
+        """
+        Gets the next gathered record, None if none arrives within the timeout
+        :param timeout: float
+        :return: Record
+        """
+        try:
+            return self.records_queue.get(block=True, timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def collect_window(self, records_buffer, min_records: int, window_seconds: float):
+        """
+        Moves the gathered records into the buffer until it holds min_records records
+        or window_seconds have elapsed (a window always contains at least one record)
+        :param records_buffer: RecordsBuffer
+        :param min_records: int
+        :param window_seconds: float
+        :return: None
+        """
+        deadline = time.monotonic() + window_seconds if window_seconds > 0 else None
+        while records_buffer.get_records_count() < min_records:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    if records_buffer.get_records_count() > 0:
+                        break
+                    deadline = None
+                    timeout = None
+            record = self.get_record(timeout)
+            if record is not None:
+                records_buffer.store_record(record)
@@ -0,0 +1,134 @@
+import numpy as np
+
+from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
+from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
+from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
+
+
+COLUMNS = {
+    "appliance": {
+        "UUID": np.int64,
+        "timestamp": object,
+        "current": np.float64,
+        "voltage": np.float64,
+        "temperature": np.float64,
+        "appliance_type": object
+    },
+    "environmental": {
+        "UUID": np.int64,
+        "timestamp": object,
+        "temperature": np.float64,
+        "humidity": np.float64
+    },
+    "occupancy": {
+        "UUID": np.int64,
+        "timestamp": object,
+        "occupancy": np.float64
+    }
+}
+"""
+Column layout returned by drain(), float columns store missing samples as NaN
+"""
+
+INTEGER_COLUMNS = {
+    "appliance": set(),
+    "environmental": set(),
+    "occupancy": {"occupancy"}
+}
+"""
+Float columns of COLUMNS holding integer samples, they are converted back to int on output
+"""
+
+
+def rows_to_columns(sensor: str, rows: list) -> dict:
+    """
+    Converts rows ordered as in COLUMNS to typed column arrays
+    :param sensor: str
+    :param rows: list
+    :return: dict
+    """
+    layout = COLUMNS[sensor]
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in layout.items()}
+    return {
+        name: np.array(values, dtype=dtype)
+        for (name, dtype), values in zip(layout.items(), zip(*rows))
+    }
+
+
+class BufferBackend:
+    """
+    Storage used by the RecordsBuffer, every backend must implement these primitives
+    """
+
+    def store_appliance(self, record: ApplianceRecord):
+        """
+        Stores the appliance record
+        :param record: ApplianceRecord
+        :return: None
+        """
+        raise NotImplementedError
+
+    def store_environmental(self, record: EnvironmentalRecord):
+        """
+        Stores the environmental record
+        :param record: EnvironmentalRecord
+        :return: None
+        """
+        raise NotImplementedError
+
+    def store_occupancy(self, record: OccupancyRecord):
+        """
+        Stores the occupancy record
+        :param record: OccupancyRecord
+        :return: None
+        """
+        raise NotImplementedError
+
+    def get_records(self) -> dict:
+        """
+        Get all buffered records, grouped by type ("appliance", "environmental", "occupancy")
+        :return: dict
+        """
+        raise NotImplementedError
+
+    def drain(self) -> dict:
+        """
+        Atomically returns and removes all buffered records.
+        Records are returned column-oriented, grouped by type, following COLUMNS
+        :return: dict
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """
+        Get the number of buffered records
+        :return: int
+        """
+        raise NotImplementedError
+
+    def delete_records(self):
+        """
+        Delete all buffered records
+        :return: None
+        """
+        raise NotImplementedError
+
+    def get_dropped_count(self) -> int:
+        """
+        Get the number of records lost because the buffer was full, none by default
+        :return: int
+        """
+        return 0
+
+    def flush(self):
+        """
+        Makes the buffered records durable, nothing to do by default
+        :return: None
+        """
+
+    def close(self):
+        """
+        Releases the resources held by the backend, nothing to do by default
+        :return: None
+        """
@@ -0,0 +1,326 @@
+import json
+import os
+
+import numpy as np
+
+from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
+from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
+from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
+from ingestion_system.src.buffer_backends.BufferBackend import BufferBackend, COLUMNS
+
+
+class SensorRing:
+    """
+    Fixed-capacity ring buffer holding the records of a single sensor, one typed array per field
+    """
+
+    capacity: int
+    """
+    Maximum number of records, once full the oldest record is overwritten
+    """
+
+    columns: dict
+    """
+    Field name -> numpy array of length capacity
+    """
+
+    head: int
+    """
+    Index of the oldest record
+    """
+
+    size: int
+    """
+    Number of records currently stored
+    """
+
+    next_uuid: int
+    """
+    Unique identifier assigned to the next stored record
+    """
+
+    dropped: int
+    """
+    Number of records overwritten because the ring was full
+    """
+
+    def __init__(self, capacity: int, fields: dict):
+        """
+        Constructor
+        :param capacity: int
+        :param fields: dict field name -> numpy dtype, float fields store missing values as NaN
+        """
+        self.capacity = capacity
+        self.columns = {"uuid": np.zeros(capacity, dtype=np.int64)}
+        for name, dtype in fields.items():
+            self.columns[name] = np.empty(capacity, dtype=dtype)
+        self.head = 0
+        self.size = 0
+        self.next_uuid = 1
+        self.dropped = 0
+
+    def append(self, values: dict):
+        """
+        Appends a record, overwriting the oldest one if the ring is full
+        :param values: dict field name -> value
+        :return: None
+        """
+        index = (self.head + self.size) % self.capacity
+        if self.size == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+            self.dropped += 1
+        else:
+            self.size += 1
+
+        self.columns["uuid"][index] = self.next_uuid
+        self.next_uuid += 1
+        for name, value in values.items():
+            column = self.columns[name]
+            if value is None and column.dtype.kind == "f":
+                value = np.nan
+            column[index] = value
+
+    def ordered(self, name: str) -> np.ndarray:
+        """
+        Gets a copy of a field, from the oldest to the newest record
+        :param name: str
+        :return: np.ndarray
+        """
+        column = self.columns[name]
+        end = self.head + self.size
+        if end <= self.capacity:
+            return column[self.head:end].copy()
+        return np.concatenate((column[self.head:], column[:end - self.capacity]))
+
+    def clear(self):
+        """
+        Removes all the records, unique identifiers keep increasing
+        :return: None
+        """
+        self.head = 0
+        self.size = 0
+
+
+def _to_optional_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _to_optional_int(value):
+    return None if np.isnan(value) else int(value)
+
+
+class RingBufferBackend(BufferBackend):
+    """
+    Records buffer backend keeping the records in memory inside per-sensor ring buffers.
+    An optional append-only journal allows to recover the buffered records after a crash.
+    """
+
+    capacity: int
+    """
+    Capacity of every sensor ring
+    """
+
+    journal_path: str
+    """
+    Path of the journal file, None to disable it
+    """
+
+    journal_fsync: bool
+    """
+    If True every journal write is forced to disk
+    """
+
+    def __init__(self, capacity: int = 1024, journal_path: str = None, journal_fsync: bool = False):
+        """
+        Constructor, if the journal exists its records are restored
+        :param capacity: int
+        :param journal_path: str
+        :param journal_fsync: bool
+        """
+        self.capacity = capacity
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self._rings = {
+            "appliance": SensorRing(capacity, {
+                "timestamp": object,
+                "current": np.float64,
+                "voltage": np.float64,
+                "temperature": np.float64,
+                "appliance_type": object
+            }),
+            "environmental": SensorRing(capacity, {
+                "timestamp": object,
+                "temperature": np.float64,
+                "humidity": np.float64
+            }),
+            "occupancy": SensorRing(capacity, {
+                "timestamp": object,
+                "occupancy": np.float64
+            })
+        }
+        self._journal = None
+        if self.journal_path is not None:
+            self._replay_journal()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay_journal(self):
+        """
+        Restores the records written in the journal
+        :return: None
+        """
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    sensor, values = json.loads(line)
+                except ValueError:
+                    # last line may be truncated by the crash
+                    break
+                self._rings[sensor].append(values)
+
+    def _append(self, sensor: str, values: dict):
+        """
+        Appends a record to the sensor ring and to the journal
+        :param sensor: str
+        :param values: dict
+        :return: None
+        """
+        self._rings[sensor].append(values)
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps([sensor, values]) + "\n")
+        self._journal.flush()
+        if self.journal_fsync:
+            os.fsync(self._journal.fileno())
+
+    def store_appliance(self, record: ApplianceRecord):
+        """
+        Stores the appliance record in the appliance ring
+        :param record: ApplianceRecord
+        :return: None
+        """
+        self._append("appliance", {
+            "timestamp": record.timestamp,
+            "current": record.current,
+            "voltage": record.voltage,
+            "temperature": record.temperature,
+            "appliance_type": record.appliance_type
+        })
+
+    def store_environmental(self, record: EnvironmentalRecord):
+        """
+        Stores the environmental record in the environmental ring
+        :param record: EnvironmentalRecord
+        :return: None
+        """
+        self._append("environmental", {
+            "timestamp": record.timestamp,
+            "temperature": record.temperature,
+            "humidity": record.humidity
+        })
+
+    def store_occupancy(self, record: OccupancyRecord):
+        """
+        Stores the occupancy record in the occupancy ring
+        :param record: OccupancyRecord
+        :return: None
+        """
+        self._append("occupancy", {
+            "timestamp": record.timestamp,
+            "occupancy": record.occupancy
+        })
+
+    def get_records(self) -> dict:
+        """
+        Get all buffered records
+        :return: dict
+        """
+        ret = {
+            "appliance": [],
+            "environmental": [],
+            "occupancy": []
+        }
+
+        ring = self._rings["appliance"]
+        for uuid, timestamp, current, voltage, temperature, appliance_type in zip(
+                ring.ordered("uuid"), ring.ordered("timestamp"), ring.ordered("current"),
+                ring.ordered("voltage"), ring.ordered("temperature"), ring.ordered("appliance_type")):
+            appliance = ApplianceRecord()
+            appliance.uuid = int(uuid)
+            appliance.timestamp = timestamp
+            appliance.current = _to_optional_float(current)
+            appliance.voltage = _to_optional_float(voltage)
+            appliance.temperature = _to_optional_float(temperature)
+            appliance.appliance_type = appliance_type
+            ret["appliance"].append(appliance)
+
+        ring = self._rings["environmental"]
+        for uuid, timestamp, temperature, humidity in zip(
+                ring.ordered("uuid"), ring.ordered("timestamp"),
+                ring.ordered("temperature"), ring.ordered("humidity")):
+            environmental = EnvironmentalRecord()
+            environmental.uuid = int(uuid)
+            environmental.timestamp = timestamp
+            environmental.temperature = _to_optional_float(temperature)
+            environmental.humidity = _to_optional_float(humidity)
+            ret["environmental"].append(environmental)
+
+        ring = self._rings["occupancy"]
+        for uuid, timestamp, occupancy in zip(
+                ring.ordered("uuid"), ring.ordered("timestamp"), ring.ordered("occupancy")):
+            record = OccupancyRecord()
+            record.uuid = int(uuid)
+            record.timestamp = timestamp
+            record.occupancy = _to_optional_int(occupancy)
+            ret["occupancy"].append(record)
+
+        return ret
+
+    def drain(self) -> dict:
+        """
+        Returns and removes all buffered records, the journal is truncated
+        :return: dict
+        """
+        ret = {}
+        for sensor, ring in self._rings.items():
+            ret[sensor] = {
+                name: ring.ordered("uuid" if name == "UUID" else name)
+                for name in COLUMNS[sensor]
+            }
+        self.delete_records()
+        return ret
+
+    def count(self) -> int:
+        """
+        Get the number of buffered records
+        :return: int
+        """
+        return sum(ring.size for ring in self._rings.values())
+
+    def get_dropped_count(self) -> int:
+        """
+        Get the number of records overwritten because a ring was full
+        :return: int
+        """
+        return sum(ring.dropped for ring in self._rings.values())
+
+    def delete_records(self):
+        """
+        Delete all buffered records and truncates the journal
+        :return: None
+        """
+        for ring in self._rings.values():
+            ring.clear()
+        if self._journal is not None:
+            self._journal.truncate(0)
+            self._journal.flush()
+
+    def close(self):
+        """
+        Closes the journal
+        :return: None
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,325 @@
+import sqlite3
+import time
+
+from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
+from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
+from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
+from ingestion_system.src.buffer_backends.BufferBackend import BufferBackend, rows_to_columns
+
+
+class SqliteBufferBackend(BufferBackend):
+    """
+    Records buffer backend storing the records in a SQLite database
+    """
+
+    db_name: str
+    """
+    The name of the database file
+    """
+
+    stored_records: int
+    """
+    Number of stored records
+    """
+
+    persistent: bool
+    """
+    If True a single long-lived connection in WAL mode is kept open and inserts are batched
+    """
+
+    batch_size: int
+    """
+    Number of pending records that triggers a flush (persistent mode only)
+    """
+
+    flush_period_seconds: float
+    """
+    Maximum time a record can stay pending before a flush (persistent mode only)
+    """
+
+    def __init__(self, persistent: bool = False, batch_size: int = 1, flush_period_seconds: float = 0.0):
+        """
+        Constructor
+        :param persistent: bool
+        :param batch_size: int
+        :param flush_period_seconds: float
+        """
+        self.db_name = "recordsBuffer.db"
+        self.stored_records = -1
+        self.persistent = persistent
+        self.batch_size = max(1, batch_size)
+        self.flush_period_seconds = flush_period_seconds
+        self._conn = None
+        self._pending = {
+            "ApplianceRecord": [],
+            "EnvironmentalRecord": [],
+            "OccupancyRecord": []
+        }
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+        if self.persistent:
+            self._conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        conn = self._connect()
+
+        # init database
+        cursor = conn.cursor()
+
+        # appliance record table
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ApplianceRecord (
+            uuid INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            current FLOAT,
+            voltage FLOAT,
+            temperature FLOAT,
+            applianceType TEXT
+        )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS EnvironmentalRecord (
+                uuid INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                temperature FLOAT,
+                humidity FLOAT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS OccupancyRecord (
+                uuid INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                occupancy INTEGER
+            )
+        """)
+        conn.commit()
+        self._release(conn)
+        self.stored_records = self.count()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Gets a connection to the database, the long-lived one in persistent mode
+        :return: sqlite3.Connection
+        """
+        if self._conn is not None:
+            return self._conn
+        return sqlite3.connect(self.db_name)
+
+    def _release(self, conn: sqlite3.Connection):
+        """
+        Releases a connection obtained by _connect
+        :param conn: sqlite3.Connection
+        :return: None
+        """
+        if conn is not self._conn:
+            conn.close()
+
+    def _insert(self, table: str, query: str, values: tuple):
+        """
+        Inserts a row, either immediately or into the write-behind batch
+        :param table: str
+        :param query: str
+        :param values: tuple
+        :return: None
+        """
+        self.stored_records += 1
+        if not self.persistent:
+            conn = self._connect()
+            conn.execute(query, values)
+            conn.commit()
+            self._release(conn)
+            return
+
+        self._pending[table].append((query, values))
+        self._pending_count += 1
+        elapsed = time.monotonic() - self._last_flush
+        if self._pending_count >= self.batch_size or elapsed >= self.flush_period_seconds:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all the pending records in a single transaction
+        :return: None
+        """
+        self._last_flush = time.monotonic()
+        if self._pending_count == 0:
+            return
+        with self._conn:
+            for table, rows in self._pending.items():
+                if not rows:
+                    continue
+                self._conn.executemany(rows[0][0], [values for _, values in rows])
+                rows.clear()
+        self._pending_count = 0
+
+    def close(self):
+        """
+        Flushes the pending records and closes the long-lived connection
+        :return: None
+        """
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+        self.persistent = False
+
+    def store_appliance(self, record: ApplianceRecord):
+        """
+        Stores the appliance record in the database
+        :param record: ApplianceRecord
+        :return: None
+        """
+        self._insert(
+            "ApplianceRecord",
+            "INSERT INTO ApplianceRecord (timestamp, current, voltage, temperature, applianceType) VALUES (?, ?, ?, ?, ?)",
+            (record.timestamp, record.current, record.voltage, record.temperature, record.appliance_type)
+        )
+
+    def store_environmental(self, record: EnvironmentalRecord):
+        """
+        Stores the environmental record in the database
+        :param record: EnvironmentalRecord
+        :return: None
+        """
+        self._insert(
+            "EnvironmentalRecord",
+            "INSERT INTO EnvironmentalRecord (timestamp, temperature, humidity) VALUES (?, ?, ?)",
+            (record.timestamp, record.temperature, record.humidity)
+        )
+
+    def store_occupancy(self, record: OccupancyRecord):
+        """
+        Stores the occupancy record in the database
+        :param record: OccupancyRecord
+        :return: None
+        """
+        self._insert(
+            "OccupancyRecord",
+            "INSERT INTO OccupancyRecord (timestamp, occupancy) VALUES (?, ?)",
+            (record.timestamp, record.occupancy)
+        )
+
+    def get_records(self) -> dict:
+        """
+        Get all buffered records
+        :return: dict
+        """
+        ret = {
+            "appliance": [],
+            "environmental": [],
+            "occupancy": []
+        }
+        if self.persistent:
+            self.flush()
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        # appliance
+        cursor.execute("SELECT * FROM ApplianceRecord")
+        records = cursor.fetchall()
+        for record in records:
+            appliance = ApplianceRecord()
+            appliance.uuid = record[0]
+            appliance.timestamp = record[1]
+            appliance.current = record[2]
+            appliance.voltage = record[3]
+            appliance.temperature = record[4]
+            appliance.appliance_type = record[5]
+            ret["appliance"].append(appliance)
+
+        # environmental
+        cursor.execute("SELECT * FROM EnvironmentalRecord")
+        records = cursor.fetchall()
+        for record in records:
+            environmental = EnvironmentalRecord()
+            environmental.uuid = record[0]
+            environmental.timestamp = record[1]
+            environmental.temperature = record[2]
+            environmental.humidity = record[3]
+            ret["environmental"].append(environmental)
+
+        # occupancy
+        cursor.execute("SELECT * FROM OccupancyRecord")
+        records = cursor.fetchall()
+        for record in records:
+            occupancy = OccupancyRecord()
+            occupancy.uuid = record[0]
+            occupancy.timestamp = record[1]
+            occupancy.occupancy = record[2]
+            ret["occupancy"].append(occupancy)
+
+        self._release(conn)
+        return ret
+
+
+    def drain(self) -> dict:
+        """
+        Returns and removes all buffered records in a single transaction.
+        Deletes are bounded by the highest uuid read, so records written concurrently are kept
+        :return: dict
+        """
+        if self.persistent:
+            self.flush()
+        tables = {
+            "appliance": "ApplianceRecord",
+            "environmental": "EnvironmentalRecord",
+            "occupancy": "OccupancyRecord"
+        }
+        ret = {}
+        drained = 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sensor, table in tables.items():
+                rows = conn.execute(f"SELECT * FROM {table} ORDER BY uuid").fetchall()
+                if rows:
+                    conn.execute(f"DELETE FROM {table} WHERE uuid <= ?", (rows[-1][0],))
+                ret[sensor] = rows_to_columns(sensor, rows)
+                drained += len(rows)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+        self.stored_records = max(0, self.count() - drained)
+        return ret
+
+    def count(self) -> int:
+        """
+        Get the number of buffered records
+        :return: int
+        """
+        if self.stored_records >= 0:
+            return self.stored_records
+        self.stored_records = 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM ApplianceRecord")
+        self.stored_records += cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM EnvironmentalRecord")
+        self.stored_records += cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM OccupancyRecord")
+        self.stored_records += cursor.fetchone()[0]
+        self._release(conn)
+        return self.stored_records
+
+    def delete_records(self):
+        """
+        Delete all buffered records
+        :return: None
+        """
+        # pending records are part of the buffer too, drop them instead of writing them
+        for rows in self._pending.values():
+            rows.clear()
+        self._pending_count = 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM ApplianceRecord")
+        cursor.execute("DELETE FROM EnvironmentalRecord")
+        cursor.execute("DELETE FROM OccupancyRecord")
+        conn.commit()
+        self._release(conn)
+        self.stored_records = 0
@@ -0,0 +1,26 @@
+from .Message import Message
+
+
+class RawSessionBatchMessage(Message):
+    """
+    Message containing several raw sessions, sent together to the batch endpoint
+    """
+
+    raw_sessions: list
+    """
+    Raw sessions to be sent, in order
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        super().__init__()
+        self.raw_sessions = []
+
+    def to_dict(self) -> list:
+        """
+        Converts the message to a list of raw session dicts for easier serialization
+        :return: list
+        """
+        return [raw_session.to_dict() for raw_session in self.raw_sessions]
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from ingestion_system.src.MessageController import MessageController, REJECTED, RETRYABLE, SENT
+from ingestion_system.src.MessageDispatcher import MessageDispatcher
+from ingestion_system.src.RawSession import RawSession
+from ingestion_system.src.WireFormat import WireFormat
+from ingestion_system.src.messages.RawSessionMessage import RawSessionMessage
+
+
+class FakeMessageController:
+    """
+    Answers every delivery with the next scripted outcome, SENT once the script is over
+    """
+
+    def __init__(self, outcomes=None):
+        self.outcomes = list(outcomes or [])
+        self.delivered = []
+        self.lock = threading.Lock()
+
+    def deliver(self, message, endpoint):
+        with self.lock:
+            self.delivered.append((message, endpoint))
+            return self.outcomes.pop(0) if self.outcomes else SENT
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("not JSON")
+        return self.body
+
+
+def raw_session_message(uuid, port=5001):
+    raw_session = RawSession()
+    raw_session.uuid = uuid
+    message = RawSessionMessage()
+    message.dst_address = "127.0.0.1"
+    message.dst_port = port
+    message.raw_session = raw_session
+    return message
+
+
+def dispatch(controller, messages, **kwargs):
+    dispatcher = MessageDispatcher(controller, backoff_seconds=0.0, **kwargs)
+    for message in messages:
+        dispatcher.submit(message, "raw_session", "[ERR] failed")
+    dispatcher.start()
+    dispatcher.stop()
+    return dispatcher.get_stats()
+
+
+def test_retries_until_sent():
+    controller = FakeMessageController([RETRYABLE, RETRYABLE])
+    stats = dispatch(controller, [raw_session_message(0)], max_retries=3)
+    assert len(controller.delivered) == 3
+    assert stats["sent"] == 1
+    assert stats["retries"] == 2
+    assert stats["failed"] == 0
+
+
+def test_gives_up_after_max_retries():
+    controller = FakeMessageController([RETRYABLE] * 10)
+    stats = dispatch(controller, [raw_session_message(0)], max_retries=2)
+    assert len(controller.delivered) == 3
+    assert stats["failed"] == 1
+
+
+def test_rejected_message_is_not_retried():
+    controller = FakeMessageController([REJECTED])
+    stats = dispatch(controller, [raw_session_message(0), raw_session_message(1)], max_retries=3)
+    assert [message.raw_session.uuid for message, _ in controller.delivered] == [0, 1]
+    assert stats["retries"] == 0
+    assert stats["failed"] == 1
+    assert stats["sent"] == 1
+
+
+def test_single_worker_keeps_order():
+    controller = FakeMessageController([RETRYABLE])
+    dispatch(controller, [raw_session_message(uuid) for uuid in range(5)], max_retries=1)
+    assert [message.raw_session.uuid for message, _ in controller.delivered] == [0, 0, 1, 2, 3, 4]
+
+
+def test_on_delivered_reports_outcome():
+    controller = FakeMessageController([REJECTED, RETRYABLE])
+    dispatcher = MessageDispatcher(controller, backoff_seconds=0.0, max_retries=1)
+    outcomes = []
+    for uuid in range(3):
+        dispatcher.submit(raw_session_message(uuid), "raw_session", "[ERR] failed",
+                          on_delivered=lambda sent, uuid=uuid: outcomes.append((uuid, sent)))
+    dispatcher.start()
+    dispatcher.stop()
+    assert outcomes == [(0, False), (1, True), (2, True)]
+
+
+def test_on_delivered_called_for_every_batched_session():
+    controller = FakeMessageController([REJECTED])
+    dispatcher = MessageDispatcher(controller, backoff_seconds=0.0, batch_size=4)
+    outcomes = []
+    for uuid in range(3):
+        dispatcher.submit(raw_session_message(uuid), "raw_session", "[ERR] failed", on_delivered=outcomes.append)
+    dispatcher.start()
+    dispatcher.stop()
+    assert len(controller.delivered) == 1
+    assert outcomes == [False, False, False]
+
+
+def test_coalesces_raw_sessions_per_destination():
+    controller = FakeMessageController()
+    messages = [raw_session_message(0), raw_session_message(1), raw_session_message(2, port=6000)]
+    stats = dispatch(controller, messages, batch_size=4, batch_endpoint="raw_sessions")
+    batch, endpoint = controller.delivered[0]
+    assert endpoint == "raw_sessions"
+    assert [raw_session.uuid for raw_session in batch.raw_sessions] == [0, 1]
+    assert controller.delivered[1] == (messages[2], "raw_session")
+    assert stats["sent"] == 3
+
+
+def test_deliver_outcomes(monkeypatch):
+    message_controller = MessageController.get_instance()
+    wire_format = WireFormat.get_instance()
+    message = raw_session_message(0)
+
+    def answer(response):
+        def post(url, data, timeout):
+            if isinstance(response, Exception):
+                raise response
+            return response
+        monkeypatch.setattr(wire_format, "post", post)
+        monkeypatch.setattr(message, "to_dict", lambda: {})
+        return message_controller.deliver(message, "raw_session")
+
+    assert answer(FakeResponse(200, {})) == SENT
+    assert answer(requests.exceptions.ConnectionError()) == RETRYABLE
+    assert answer(FakeResponse(503)) == RETRYABLE
+    assert answer(requests.exceptions.ReadTimeout()) == REJECTED
+    assert answer(FakeResponse(400, {"error": "invalid raw session"})) == REJECTED
+    assert answer(FakeResponse(500, {"error": "internal"})) == REJECTED
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from ingestion_system.src.IngestionSystemOrchestrator import IngestionSystemOrchestrator
+from ingestion_system.src.RawSession import RawSession
+from ingestion_system.src.buffer_backends.BufferBackend import rows_to_columns
+from ingestion_system.src.records.ExpertRecord import ExpertRecord
+
+
+def raw_session(layout):
+    session = RawSession()
+    session.uuid = 7
+    session.expert_record = ExpertRecord()
+    session.layout = layout
+    session.columns = {
+        "appliance": rows_to_columns("appliance", [(1, "t0", 1.5, None, 40.0, "fridge")]),
+        "environmental": rows_to_columns("environmental", [(1, "t0", None, None)]),
+        "occupancy": rows_to_columns("occupancy", [(1, "t0", 2), (2, "t1", None)])
+    }
+    return session
+
+
+def test_rows_layout():
+    ret = raw_session("rows").to_dict()
+    assert ret["applianceRecords"] == [{
+        "UUID": 1, "timestamp": "t0", "current": 1.5, "voltage": None, "temperature": 40.0, "appliance_type": "fridge"
+    }]
+    assert ret["environmentalRecords"] == [{"UUID": 1, "timestamp": "t0", "temperature": None, "humidity": None}]
+    assert ret["occupancyRecords"] == [
+        {"UUID": 1, "timestamp": "t0", "occupancy": 2},
+        {"UUID": 2, "timestamp": "t1", "occupancy": None}
+    ]
+    assert isinstance(ret["occupancyRecords"][0]["occupancy"], int)
+
+
+def test_columnar_layout():
+    ret = raw_session("columnar").to_dict()
+    assert ret["UUID"] == 7
+    assert ret["appliance"]["voltage"] == [None]
+    assert ret["occupancy"]["occupancy"] == [2, None]
+    assert isinstance(ret["occupancy"]["occupancy"][0], int)
+    assert isinstance(ret["occupancy"]["UUID"][0], int)
+
+
+def test_missing_fields_are_not_missing_samples():
+    session = raw_session("rows")
+    assert np.isnan(session.columns["environmental"]["temperature"]).all()
+    assert IngestionSystemOrchestrator().mark_missing_samples(session) == 0
@@ -0,0 +1,173 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from ingestion_system.src.RecordsBuffer import RecordsBuffer
+from ingestion_system.src.buffer_backends.RingBufferBackend import RingBufferBackend
+from ingestion_system.src.buffer_backends.SqliteBufferBackend import SqliteBufferBackend
+from ingestion_system.src.records.ApplianceRecord import ApplianceRecord
+from ingestion_system.src.records.EnvironmentalRecord import EnvironmentalRecord
+from ingestion_system.src.records.OccupancyRecord import OccupancyRecord
+
+
+def appliance(current):
+    record = ApplianceRecord()
+    record.timestamp = "2024-01-01T00:00:00"
+    record.current = current
+    record.voltage = 230.0
+    record.temperature = 40.0
+    record.appliance_type = "fridge"
+    return record
+
+
+def environmental(temperature):
+    record = EnvironmentalRecord()
+    record.timestamp = "2024-01-01T00:00:00"
+    record.temperature = temperature
+    record.humidity = 50.0
+    return record
+
+
+def occupancy(people):
+    record = OccupancyRecord()
+    record.timestamp = "2024-01-01T00:00:00"
+    record.occupancy = people
+    return record
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # the SQLite backend creates its database in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(params=["ring", "sqlite", "sqlite_persistent"])
+def records_buffer(request):
+    if request.param == "ring":
+        backend = RingBufferBackend(capacity=16)
+    else:
+        backend = SqliteBufferBackend(persistent=request.param == "sqlite_persistent", batch_size=4,
+                                      flush_period_seconds=60.0)
+    records_buffer = RecordsBuffer(backend)
+    yield records_buffer
+    records_buffer.close()
+
+
+def test_get_records(records_buffer):
+    records_buffer.store_record(appliance(1.5))
+    records_buffer.store_record(environmental(None))
+    records_buffer.store_record(occupancy(3))
+
+    records = records_buffer.get_records()
+    assert records_buffer.get_records_count() == 3
+    assert [r.current for r in records["appliance"]] == [1.5]
+    assert [r.temperature for r in records["environmental"]] == [None]
+    assert [r.occupancy for r in records["occupancy"]] == [3]
+
+
+def test_delete_records(records_buffer):
+    records_buffer.store_record(appliance(1.5))
+    records_buffer.store_record(occupancy(3))
+    records_buffer.delete_records()
+
+    assert records_buffer.get_records_count() == 0
+    assert records_buffer.get_records() == {"appliance": [], "environmental": [], "occupancy": []}
+
+
+def test_ring_overwrites_oldest():
+    backend = RingBufferBackend(capacity=3)
+    for current in range(5):
+        backend.store_appliance(appliance(float(current)))
+
+    records = backend.get_records()["appliance"]
+    assert [r.current for r in records] == [2.0, 3.0, 4.0]
+    assert [r.uuid for r in records] == [3, 4, 5]
+    assert backend.get_dropped_count() == 2
+    assert backend.count() == 3
+
+
+def test_ring_wraps_around_after_clear():
+    backend = RingBufferBackend(capacity=4)
+    for current in range(3):
+        backend.store_appliance(appliance(float(current)))
+    backend.delete_records()
+    for current in range(3, 7):
+        backend.store_appliance(appliance(float(current)))
+
+    np.testing.assert_array_equal(backend.drain()["appliance"]["current"], [3.0, 4.0, 5.0, 6.0])
+
+
+def test_journal_replay(tmp_path):
+    journal_path = str(tmp_path / "records.journal")
+    backend = RingBufferBackend(capacity=8, journal_path=journal_path)
+    backend.store_appliance(appliance(1.5))
+    backend.store_environmental(environmental(21.0))
+    backend.store_occupancy(occupancy(None))
+    backend.close()
+
+    # a crash may leave the last line truncated
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('["appliance", {"timest')
+
+    restored = RingBufferBackend(capacity=8, journal_path=journal_path)
+    records = restored.get_records()
+    assert restored.count() == 3
+    assert [r.current for r in records["appliance"]] == [1.5]
+    assert [r.temperature for r in records["environmental"]] == [21.0]
+    assert [r.occupancy for r in records["occupancy"]] == [None]
+    restored.close()
+
+
+def test_journal_truncated_on_delete(tmp_path):
+    journal_path = str(tmp_path / "records.journal")
+    backend = RingBufferBackend(capacity=8, journal_path=journal_path)
+    backend.store_appliance(appliance(1.5))
+    backend.delete_records()
+    backend.close()
+
+    restored = RingBufferBackend(capacity=8, journal_path=journal_path)
+    assert restored.count() == 0
+    restored.close()
+
+
+def test_drain(records_buffer):
+    records_buffer.store_record(appliance(1.5))
+    records_buffer.store_record(appliance(None))
+    records_buffer.store_record(environmental(21.0))
+    records_buffer.store_record(occupancy(None))
+
+    columns = records_buffer.drain()
+    np.testing.assert_array_equal(columns["appliance"]["current"], [1.5, np.nan])
+    assert columns["appliance"]["appliance_type"].tolist() == ["fridge", "fridge"]
+    np.testing.assert_array_equal(columns["environmental"]["temperature"], [21.0])
+    assert np.isnan(columns["occupancy"]["occupancy"]).all()
+    assert records_buffer.get_records_count() == 0
+    assert records_buffer.drain()["appliance"]["current"].size == 0
+
+
+def test_drain_keeps_later_records(records_buffer):
+    records_buffer.store_record(appliance(1.5))
+    records_buffer.drain()
+    records_buffer.store_record(appliance(2.5))
+
+    assert records_buffer.get_records_count() == 1
+    np.testing.assert_array_equal(records_buffer.drain()["appliance"]["current"], [2.5])
+
+
+def test_dropped_count(records_buffer):
+    records_buffer.store_record(appliance(1.5))
+    assert records_buffer.get_dropped_count() == 0
+
+
+def test_dropped_count_of_full_ring():
+    records_buffer = RecordsBuffer(RingBufferBackend(capacity=2))
+    for current in range(3):
+        records_buffer.store_record(appliance(float(current)))
+    records_buffer.store_record(occupancy(1))
+
+    assert records_buffer.get_dropped_count() == 1
+    records_buffer.drain()
+    assert records_buffer.get_dropped_count() == 1
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import msgpack
+import pytest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from ingestion_system.src.WireFormat import MSGPACK_MIMETYPE, WireRequest
+
+
+def wire_request(body, content_type=MSGPACK_MIMETYPE):
+    app = Flask(__name__)
+    app.request_class = WireRequest
+    context = app.test_request_context("/", method="POST", data=body, content_type=content_type)
+    context.push()
+    return context
+
+
+def test_decodes_msgpack():
+    context = wire_request(msgpack.packb({"uuid": "a", "values": [1, 2.5]}))
+    assert context.request.get_json() == {"uuid": "a", "values": [1, 2.5]}
+    context.pop()
+
+
+def test_decodes_json():
+    context = wire_request(b'{"uuid": "a"}', content_type="application/json")
+    assert context.request.get_json() == {"uuid": "a"}
+    context.pop()
+
+
+def test_invalid_msgpack():
+    context = wire_request(b"\xc1")
+    assert context.request.get_json(silent=True) is None
+    with pytest.raises(BadRequest):
+        context.request.get_json()
+    context.pop()
+
+
+def test_body_cached_only_on_request():
+    context = wire_request(msgpack.packb({"uuid": "a"}))
+    # keeps the raw body, get_data(cache=False) would consume the stream
+    context.request.get_data()
+    assert context.request.get_json(cache=False) == {"uuid": "a"}
+    assert context.request._msgpack_body is None
+    context.request.get_json()
+    assert context.request._msgpack_body == {"uuid": "a"}
+    context.pop()
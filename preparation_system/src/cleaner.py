@@ -1,112 +1,116 @@
 import numpy as np
 
-
-def _interpolate_list_of_values(values):
-    ts = np.array(values, dtype=float)
-    valid = ~np.isnan(ts)
-    invalid = np.isnan(ts)
-
-    if valid.sum() == 0:
-        return ts.tolist()
-
-    ts[invalid] = np.interp(
-        x=np.flatnonzero(invalid),
-        xp=np.flatnonzero(valid),
-        fp=ts[valid]
-    )
-    return ts.tolist()
+# record group -> field -> key of its limits
+FIELDS = {
+    "applianceRecords": {
+        "current": "current",
+        "voltage": "voltage",
+        "temperature": "temperature"
+    },
+    "environmentalRecords": {
+        "temperature": "ex_temperature",
+        "humidity": "humidity"
+    },
+    "occupancyRecords": {
+        "occupancy": "occupancy"
+    }
+}
+
+
+def _interpolate_columns(values):
+    # same result as np.interp on every column, missing values are taken from the
+    # nearest valid samples and clamped at the edges, all-missing columns stay NaN
+    n = values.shape[0]
+    invalid = np.isnan(values)
+    if n == 0 or not invalid.any():
+        return values
+
+    index = np.arange(n)[:, None]
+    prev_index = np.maximum.accumulate(np.where(invalid, -1, index), axis=0)
+    next_index = np.minimum.accumulate(np.where(invalid, n, index)[::-1], axis=0)[::-1]
+    has_prev = prev_index >= 0
+    has_next = next_index < n
+
+    prev_value = np.take_along_axis(values, np.clip(prev_index, 0, n - 1), axis=0)
+    next_value = np.take_along_axis(values, np.clip(next_index, 0, n - 1), axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (next_value - prev_value) / (next_index - prev_index)
+        interpolated = slope * (index - prev_index) + prev_value
+
+    interpolated = np.where(has_prev, np.where(has_next, interpolated, prev_value), next_value)
+    return np.where(invalid, interpolated, values)
+
+
+def _to_array(records, fields):
+    # one row per record, one column per field, missing values as NaN
+    return np.array(
+        [[np.nan if rec.get(field) is None else rec.get(field) for field in fields] for rec in records],
+        dtype=float
+    ).reshape(len(records), len(fields))
+
+
+def _to_records(records, fields, values):
+    for rec, row in zip(records, values.tolist()):
+        for field, new_val in zip(fields, row):
+            rec[field] = new_val
 
 
 class Cleaner:
     def __init__(self, limits: dict):
         self.limits = limits
-
-    def correct_missing_samples(self, session: dict):
+        # per group bounds, in the same order of the fields
+        self._min = {}
+        self._max = {}
+        for group, fields in FIELDS.items():
+            self._min[group] = np.array([limits[key]["min"] for key in fields.values()], dtype=float)
+            self._max[group] = np.array([limits[key]["max"] for key in fields.values()], dtype=float)
+
+    def _remove_outliers(self, group, values):
+        # the comparisons are False for NaN, so missing values are masked as well
+        in_range = (values >= self._min[group]) & (values <= self._max[group])
+        return _interpolate_columns(np.where(in_range, values, np.nan))
+
+    def clean_array(self, group, values):
+        # missing samples and outliers of a record group, one column per field of FIELDS[group]
+        return self._remove_outliers(group, _interpolate_columns(values))
+
+    def clean_columns(self, session: dict):
+        # missing samples and outliers corrected in a single pass over each record group,
+        # returns group -> field -> column without touching the session
+        columns = {}
+        for group, fields in FIELDS.items():
+            if group not in session:
+                continue
+            values = self.clean_array(group, _to_array(session[group], fields))
+            columns[group] = {field: values[:, i] for i, field in enumerate(fields)}
+        return columns
+
+    def clean(self, session: dict):
+        # same result as correct_missing_samples followed by correct_outliers
         corrected = session.copy()
 
-        if "applianceRecords" in corrected:
-            for field in ["current", "voltage", "temperature"]:
-                values = []
-                for rec in corrected["applianceRecords"]:
-                    v = rec.get(field)
-                    values.append(np.nan if v is None else float(v))
-
-                interpolated = _interpolate_list_of_values(values)
-
-                for rec, new_val in zip(corrected["applianceRecords"], interpolated):
-                    rec[field] = new_val
+        for group, columns in self.clean_columns(corrected).items():
+            _to_records(corrected[group], list(columns.keys()), np.column_stack(list(columns.values())))
 
-        if "environmentalRecords" in corrected:
-            for field in ["temperature", "humidity"]:
-                values = []
-                for rec in corrected["environmentalRecords"]:
-                    v = rec.get(field)
-                    values.append(np.nan if v is None else float(v))
-
-                interpolated = _interpolate_list_of_values(values)
-
-                for rec, new_val in zip(corrected["environmentalRecords"], interpolated):
-                    rec[field] = new_val
-
-        if "occupancyRecords" in corrected:
-            values = []
-            for rec in corrected["occupancyRecords"]:
-                v = rec.get("occupancy")
-                values.append(np.nan if v is None else float(v))
+        return corrected
 
-            interpolated = _interpolate_list_of_values(values)
+    def correct_missing_samples(self, session: dict):
+        corrected = session.copy()
 
-            for rec, new_val in zip(corrected["occupancyRecords"], interpolated):
-                rec["occupancy"] = new_val
+        for group, fields in FIELDS.items():
+            if group in corrected:
+                values = _interpolate_columns(_to_array(corrected[group], fields))
+                _to_records(corrected[group], fields, values)
 
         return corrected
 
     def correct_outliers(self, session: dict):
         corrected = session.copy()
 
-        def process_records(records, fields_mapping):
-            for field_json_name, limit_key in fields_mapping.items():
-                min_val = self.limits[limit_key]["min"]
-                max_val = self.limits[limit_key]["max"]
-
-                values = []
-                for rec in records:
-                    v = rec.get(field_json_name)
-                    v = np.nan if v is None else float(v)
-                    if np.isnan(v) or v < min_val or v > max_val:
-                        v = np.nan
-                    values.append(v)
-
-                interpolated = _interpolate_list_of_values(values)
-
-                for rec, new_val in zip(records, interpolated):
-                    rec[field_json_name] = new_val
-
-        if "applianceRecords" in corrected:
-            process_records(
-                corrected["applianceRecords"],
-                {
-                    "current": "current",
-                    "voltage": "voltage",
-                    "temperature": "temperature"
-                }
-            )
-
-        if "environmentalRecords" in corrected:
-            process_records(
-                corrected["environmentalRecords"],
-                {
-                    "temperature": "ex_temperature",
-                    "humidity": "humidity"
-                }
-            )
-
-        if "occupancyRecords" in corrected:
-            process_records(
-                corrected["occupancyRecords"],
-                {
-                    "occupancy": "occupancy"
-                }
-            )
+        for group, fields in FIELDS.items():
+            if group in corrected:
+                values = self._remove_outliers(group, _to_array(corrected[group], fields))
+                _to_records(corrected[group], fields, values)
 
         return corrected
@@ -1,7 +1,10 @@
 import queue
+import time
 from threading import Thread
 from flask import Flask, request
-from requests import post, exceptions
+from requests import exceptions
+
+from preparation_system.src.wire_format import WireFormat, WireRequest
 
 
 class JsonIO:
@@ -10,6 +13,8 @@ class JsonIO:
     def __init__(self):
         # Flask instance to receive data
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
         # a thread-safe queue to buffer the received json message
         self._received_json_queue = queue.Queue()
 
@@ -32,8 +37,27 @@ class JsonIO:
     def get_queue(self):
         return self._received_json_queue
 
-    def receive(self):
-        return self._received_json_queue.get(block=True)
+    def receive(self, timeout=None):
+        # None if nothing arrives within the timeout
+        try:
+            return self._received_json_queue.get(block=True, timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def receive_batch(self, max_items, timeout):
+        # block for the first message, then take what arrives within the timeout, up to max_items
+        batch = [self._received_json_queue.get(block=True)]
+        deadline = time.monotonic() + timeout
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._received_json_queue.get(block=True, timeout=remaining))
+                else:
+                    batch.append(self._received_json_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
 
     def put_json_into_queue(self, received_json):
         self._received_json_queue.put(received_json)
@@ -42,7 +66,7 @@ class JsonIO:
         url = f'http://{ip}:{port}/' + endpoint
         response = None
         try:
-            response = post(url, json=data, timeout=10.0)
+            response = WireFormat.get_instance().post(url, data, timeout=10.0)
         except exceptions.RequestException:
             print("Endpoint system unreachable")
             return False
@@ -71,6 +95,16 @@ def post_json():
     return {}, 200
 
 
+@app.post("/raw_sessions")
+def post_json_batch():
+    if not isinstance(request.json, list):
+        return {'error': 'No JSON array received'}, 500
+
+    for received_json in request.json:
+        JsonIO.get_instance().put_json_into_queue(received_json)
+    return {}, 200
+
+
 @app.route("/")
 def home():
     return "Preparation System online!"
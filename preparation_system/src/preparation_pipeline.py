@@ -0,0 +1,132 @@
+import numpy as np
+
+from preparation_system.src.cleaner import Cleaner, FIELDS
+from preparation_system.src.raw_session_layout import COLUMN_GROUPS, is_columnar
+from preparation_system.src.raw_session_schema_verifier import RawSessionSchemaVerifier
+
+# record group -> (required keys, string fields checked after the measures)
+RECORD_KEYS = {
+    "applianceRecords": (["UUID", "timestamp", "current", "voltage", "temperature", "appliance_type"],
+                         ["appliance_type"]),
+    "environmentalRecords": (["UUID", "timestamp", "temperature", "humidity"], []),
+    "occupancyRecords": (["UUID", "timestamp", "occupancy"], [])
+}
+
+# record group -> field -> prepared session feature
+FEATURES = {
+    "applianceRecords": {
+        "current": "mean_current",
+        "voltage": "mean_voltage",
+        "temperature": "mean_temperature"
+    },
+    "environmentalRecords": {
+        "temperature": "mean_external_temperature",
+        "humidity": "mean_external_humidity"
+    },
+    "occupancyRecords": {
+        "occupancy": "mean_occupancy"
+    }
+}
+
+
+class PreparationPipeline:
+    # Validates, cleans and extracts a raw session with a single pass over each record group.
+    # Built once from the limits and reused for every session, gives the same prepared session
+    # (and the same validation errors) of RawSessionSchemaVerifier, Cleaner and Extractor.
+    # Given a verifier (e.g. FastRawSessionSchemaVerifier with trusted sampling) the whole session
+    # is verified by it first and the pass only gathers the measures
+
+    def __init__(self, limits: dict, verifier: RawSessionSchemaVerifier = None):
+        self._session_verifier = verifier
+        self._verifier = RawSessionSchemaVerifier()
+        self._cleaner = Cleaner(limits)
+
+    def prepare(self, raw_session: dict) -> dict:
+        if self._session_verifier is not None:
+            self._session_verifier.verify(raw_session)
+            return self._extract(raw_session, self._gather(raw_session))
+
+        if is_columnar(raw_session):
+            return self._prepare_columnar(raw_session)
+
+        verifier = self._verifier
+        verifier.require_keys(raw_session, ["UUID", "applianceRecords", "environmentalRecords",
+                                            "occupancyRecords", "expertRecord"])
+        verifier.verify_uuid(raw_session["UUID"])
+
+        groups = {}
+        for group, fields in FIELDS.items():
+            groups[group] = self._read_group(group, list(fields), raw_session[group])
+
+        verifier.verify_expert_record(raw_session["expertRecord"])
+
+        return self._extract(raw_session, groups)
+
+    def _prepare_columnar(self, raw_session: dict) -> dict:
+        # the columns are checked and stacked as they are, no record is built
+        verifier = self._verifier
+        verifier.require_keys(raw_session, ["UUID", "appliance", "environmental", "occupancy", "expertRecord"])
+        verifier.verify_uuid(raw_session["UUID"])
+
+        for name in COLUMN_GROUPS.values():
+            verifier.verify_columns(name, raw_session[name])
+        groups = self._gather(raw_session)
+
+        verifier.verify_expert_record(raw_session["expertRecord"])
+
+        return self._extract(raw_session, groups)
+
+    def _gather(self, raw_session: dict) -> dict:
+        # measures of a verified session, missing ones (None) as NaN. Records skipped by a sampling
+        # verifier are not checked: a malformed one still fails here, with a different message
+        columnar = is_columnar(raw_session)
+        groups = {}
+        try:
+            for group, fields in FIELDS.items():
+                if columnar:
+                    columns = raw_session[COLUMN_GROUPS[group]]
+                    groups[group] = np.array([columns[field] for field in fields], dtype=float).T
+                else:
+                    rows = [[entry[field] for field in fields] for entry in raw_session[group]]
+                    groups[group] = np.array(rows, dtype=float).reshape(len(rows), len(fields))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed records: {e!r}") from e
+        return groups
+
+    def _extract(self, raw_session, groups):
+        # cleans every group and computes the features
+        prepared_session = {
+            "UUID": raw_session.get("UUID"),
+            "label": raw_session["expertRecord"].get("label")
+        }
+        for group, values in groups.items():
+            values = self._cleaner.clean_array(group, values)
+            for i, feature in enumerate(FEATURES[group].values()):
+                column = values[:, i].tolist()
+                # same summation order of the Extractor
+                prepared_session[feature] = sum(column) / len(column) if column else None
+
+        return prepared_session
+
+    def _read_group(self, group, fields, items):
+        # checks every record and gathers its measures, missing ones as NaN
+        if not isinstance(items, list):
+            raise ValueError(f"{group} must be a list")
+
+        verifier = self._verifier
+        required, strings = RECORD_KEYS[group]
+        rows = []
+        for entry in items:
+            verifier.require_keys(entry, required)
+            verifier.verify_uuid(entry["UUID"])
+            verifier.verify_string(entry["timestamp"])
+            row = []
+            for field in fields:
+                value = entry[field]
+                verifier.verify_float(value)
+                row.append(np.nan if value is None else value)
+            for field in strings:
+                verifier.verify_string(entry[field])
+            rows.append(row)
+
+        return np.array(rows, dtype=float).reshape(len(rows), len(fields))
@@ -1,11 +1,20 @@
+import bisect
 import json
 import sys
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from threading import Thread
 from preparation_system.src.json_io import JsonIO
+from preparation_system.src.pooled_transport import PooledTransport
+from preparation_system.src.wire_format import WireFormat
 from preparation_system.src.cleaner import Cleaner
 from preparation_system.src.extractor import Extractor
-from preparation_system.src.raw_session_schema_verifier import RawSessionSchemaVerifier
+from preparation_system.src.preparation_pipeline import PreparationPipeline
+from preparation_system.src.raw_session_layout import is_columnar, to_rows
+from preparation_system.src.raw_session_schema_verifier import RawSessionSchemaVerifier, \
+    FastRawSessionSchemaVerifier
 from preparation_system.src.preparation_system_configurator import PreparationSystemConfigurator
 
 LOG_FILE = "preparation_system.log"
@@ -25,18 +34,57 @@ logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
 
+# preparation system of a worker process, set by the pool initializer
+_worker_system = None
+
+
+def _init_worker(preparation_system_config):
+    global _worker_system
+    _worker_system = PreparationSystem()
+    _worker_system.setup(preparation_system_config)
+
+
+def _prepare_in_worker(raw_session):
+    return _worker_system.prepare(raw_session)
+
+
+def _order_key(raw_session):
+    # malformed sessions are rejected by the workers, they do not wait for the others
+    uuid = raw_session.get("UUID") if isinstance(raw_session, dict) else None
+    return uuid if isinstance(uuid, int) else -1
+
+
 class PreparationSystem:
 
     def __init__(self):
         self.preparation_system_config = None
+        self.cleaner = None
+        self.preparation_pipeline = None
         self.raw_session_schema_verifier = RawSessionSchemaVerifier()
         self.preparation_system_configurator = PreparationSystemConfigurator()
 
+    def setup(self, preparation_system_config):
+        self.preparation_system_config = preparation_system_config
+        self.cleaner = Cleaner(self.preparation_system_config["limits"])
+        validation = self.preparation_system_config.get("validation", {})
+        if validation.get("fast", False):
+            self.raw_session_schema_verifier = FastRawSessionSchemaVerifier(
+                validation.get("trusted_sample_ratio", 1.0))
+        if self.preparation_system_config.get("fused_pipeline", False):
+            # the reference checks are fused in the pipeline pass, a fast verifier runs before it
+            verifier = self.raw_session_schema_verifier if validation.get("fast", False) else None
+            self.preparation_pipeline = PreparationPipeline(self.preparation_system_config["limits"], verifier)
+
     def run(self):
-        self.preparation_system_config = self.preparation_system_configurator.import_cfg()
+        self.setup(self.preparation_system_configurator.import_cfg())
 
         logging.info("Configuration loaded")
 
+        http_pool = self.preparation_system_config.get("http_pool", {})
+        PooledTransport.get_instance().configure(http_pool.get("pool_connections", 4),
+                                                 http_pool.get("pool_maxsize", 8))
+        WireFormat.get_instance().configure(self.preparation_system_config.get("wire_format", "json"))
+
         jsonIO = JsonIO.get_instance()
         listener = Thread(
             target=jsonIO.listener,
@@ -46,43 +94,146 @@ class PreparationSystem:
         listener.setDaemon(True)
         listener.start()
 
-        while True:
-
-            raw_session = JsonIO.get_instance().receive()
-            logging.info(f"Raw session received: {raw_session}")
-
-            try:
-                self.raw_session_schema_verifier.verify(raw_session)
-            except ValueError as e:
-                logging.error(f"Raw session validation failed: {e}")
-                continue
-
-            cleaner = Cleaner(self.preparation_system_config["limits"])
+        workers_config = self.preparation_system_config.get("workers", {})
+        if workers_config.get("processes", 0) > 0:
+            self.run_workers(workers_config["processes"], workers_config.get("max_in_flight", 16),
+                             workers_config.get("poll_seconds", 0.01))
+            return
 
-            raw_session = cleaner.correct_missing_samples(raw_session)
-            logging.info("Missing samples corrected")
+        batch_config = self.preparation_system_config.get("batch", {})
+        batch_size = batch_config.get("max_size", 1)
+        batch_wait = batch_config.get("wait_seconds", 0.0)
 
-            raw_session = cleaner.correct_outliers(raw_session)
-            logging.info("Outliers corrected")
-
-            extractor = Extractor(raw_session)
-            prepared_session = extractor.extract()
-            logging.info("Prepared session extracted")
-
-            is_development_phase = bool(self.preparation_system_config['development_phase'])
-
-            next_system = 'production_system'
-            if is_development_phase:
-                next_system = 'segregation_system'
-
-            logging.info("Prepared session ready")
-            logging.info(prepared_session)
+        while True:
 
+            raw_sessions = JsonIO.get_instance().receive_batch(batch_size, batch_wait)
+            prepared_sessions = []
+
+            for raw_session in raw_sessions:
+                prepared_session = self.prepare(raw_session)
+                if prepared_session is not None:
+                    prepared_sessions.append(prepared_session)
+
+            self.forward(prepared_sessions)
+
+    def run_workers(self, processes, max_in_flight, poll_seconds):
+        # raw sessions are prepared by a pool of processes, the results are sent in UUID order:
+        # the in flight sessions are kept sorted and only the completed head is released
+        logging.info(f"Preparing on {processes} worker processes")
+        in_flight = []
+        sequence = 0
+
+        pool = self.start_pool(processes)
+        try:
+            while True:
+                if len(in_flight) < max_in_flight:
+                    # block only when there is nothing to wait for
+                    raw_session = JsonIO.get_instance().receive(None if not in_flight else poll_seconds)
+                    if raw_session is not None:
+                        try:
+                            future = pool.submit(_prepare_in_worker, raw_session)
+                        except BrokenProcessPool:
+                            # a worker died, the sessions in flight fail with the old pool
+                            logging.error("Worker pool broken, restarting it")
+                            pool.shutdown(wait=False)
+                            pool = self.start_pool(processes)
+                            future = pool.submit(_prepare_in_worker, raw_session)
+                        bisect.insort(in_flight, (_order_key(raw_session), sequence, future),
+                                      key=lambda entry: entry[:2])
+                        sequence += 1
+                else:
+                    wait([in_flight[0][2]])
+
+                prepared_sessions = []
+                while in_flight and in_flight[0][2].done():
+                    try:
+                        prepared_session = in_flight.pop(0)[2].result()
+                    except Exception as e:
+                        # the session is dropped, the others go on
+                        logging.error(f"Raw session preparation failed: {e!r}")
+                        continue
+                    if prepared_session is not None:
+                        prepared_sessions.append(prepared_session)
+
+                self.forward(prepared_sessions)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def start_pool(self, processes):
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                   initargs=(self.preparation_system_config,))
+
+    def forward(self, prepared_sessions):
+        if len(prepared_sessions) == 0:
+            return
+
+        is_development_phase = bool(self.preparation_system_config['development_phase'])
+
+        next_system = 'production_system'
+        if is_development_phase:
+            next_system = 'segregation_system'
+
+        if len(prepared_sessions) == 1:
             JsonIO.get_instance().send(
                 self.preparation_system_config[next_system]["ip"],
                 self.preparation_system_config[next_system]["port"],
                 "/prepared_session",
-                prepared_session
+                prepared_sessions[0]
             )
-
             logging.info("Prepared session sent")
+        else:
+            JsonIO.get_instance().send(
+                self.preparation_system_config[next_system]["ip"],
+                self.preparation_system_config[next_system]["port"],
+                "/prepared_sessions",
+                prepared_sessions
+            )
+            logging.info(f"{len(prepared_sessions)} prepared sessions sent")
+
+    def prepare(self, raw_session):
+        logging.info(f"Raw session received: {raw_session}")
+        start = time.perf_counter()
+
+        if self.preparation_pipeline is not None:
+            try:
+                prepared_session = self.preparation_pipeline.prepare(raw_session)
+            except ValueError as e:
+                logging.error(f"Raw session validation failed: {e}")
+                return None
+            if isinstance(self.raw_session_schema_verifier, FastRawSessionSchemaVerifier):
+                self.log_validation_time()
+            logging.info(f"Prepared session ready in {(time.perf_counter() - start) * 1000:.3f} ms")
+            logging.info(prepared_session)
+            return prepared_session
+
+        try:
+            self.raw_session_schema_verifier.verify(raw_session)
+        except ValueError as e:
+            logging.error(f"Raw session validation failed: {e}")
+            return None
+        if isinstance(self.raw_session_schema_verifier, FastRawSessionSchemaVerifier):
+            self.log_validation_time()
+        else:
+            logging.info(f"Raw session validated in {(time.perf_counter() - start) * 1000:.3f} ms")
+
+        if is_columnar(raw_session):
+            # the record based cleaner and extractor need the row layout
+            raw_session = to_rows(raw_session)
+
+        raw_session = self.cleaner.clean(raw_session)
+        logging.info("Missing samples and outliers corrected")
+
+        extractor = Extractor(raw_session)
+        prepared_session = extractor.extract()
+        logging.info("Prepared session extracted")
+
+        logging.info(f"Prepared session ready in {(time.perf_counter() - start) * 1000:.3f} ms")
+        logging.info(prepared_session)
+
+        return prepared_session
+
+    def log_validation_time(self):
+        verifier = self.raw_session_schema_verifier
+        logging.info(f"Raw session validated in {verifier.last_seconds * 1000:.3f} ms "
+                     f"(mean {verifier.total_seconds / verifier.sessions * 1000:.3f} ms "
+                     f"over {verifier.sessions} sessions)")
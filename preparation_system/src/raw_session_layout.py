@@ -0,0 +1,26 @@
+# Raw sessions come in two layouts. The row layout has a list of record dicts per group:
+#   {"UUID", "applianceRecords": [{"UUID", "timestamp", "current", ...}, ...], ..., "expertRecord"}
+# the columnar layout has a list per field, as gathered by the ingestion buffer:
+#   {"UUID", "appliance": {"UUID": [...], "timestamp": [...], "current": [...], ...}, ..., "expertRecord"}
+
+# record group of the row layout -> group of the columnar layout
+COLUMN_GROUPS = {
+    "applianceRecords": "appliance",
+    "environmentalRecords": "environmental",
+    "occupancyRecords": "occupancy"
+}
+
+
+def is_columnar(raw_session):
+    return isinstance(raw_session, dict) and "appliance" in raw_session
+
+
+def to_rows(raw_session):
+    # row layout of a verified columnar raw session
+    rows = {"UUID": raw_session["UUID"]}
+    for group, name in COLUMN_GROUPS.items():
+        columns = raw_session[name]
+        fields = list(columns)
+        rows[group] = [dict(zip(fields, values)) for values in zip(*columns.values())]
+    rows["expertRecord"] = raw_session["expertRecord"]
+    return rows
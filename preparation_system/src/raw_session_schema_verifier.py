@@ -1,18 +1,66 @@
+import time
+from operator import itemgetter
+
+from preparation_system.src.raw_session_layout import COLUMN_GROUPS, is_columnar
+
+
 class RawSessionSchemaVerifier:
 
+    # columnar group -> field -> check of each value, same checks of the row layout
+    COLUMNS = {
+        "appliance": {"UUID": "verify_uuid", "timestamp": "verify_string", "current": "verify_float",
+                      "voltage": "verify_float", "temperature": "verify_float",
+                      "appliance_type": "verify_string"},
+        "environmental": {"UUID": "verify_uuid", "timestamp": "verify_string",
+                          "temperature": "verify_float", "humidity": "verify_float"},
+        "occupancy": {"UUID": "verify_uuid", "timestamp": "verify_string", "occupancy": "verify_float"}
+    }
+
     def verify(self, data: dict):
-        self._require_keys(data, ["UUID", "applianceRecords", "environmentalRecords",
-                                  "occupancyRecords", "expertRecord"])
+        if is_columnar(data):
+            return self.verify_columnar(data)
 
-        self._verify_uuid(data["UUID"])
+        self.require_keys(data, ["UUID", "applianceRecords", "environmentalRecords",
+                                 "occupancyRecords", "expertRecord"])
+
+        self.verify_uuid(data["UUID"])
         self._verify_appliance_records(data["applianceRecords"])
         self._verify_environmental_records(data["environmentalRecords"])
         self._verify_occupancy_records(data["occupancyRecords"])
-        self._verify_expert_record(data["expertRecord"])
+        self.verify_expert_record(data["expertRecord"])
 
         return True
 
-    def _verify_uuid(self, value):
+    def verify_columnar(self, data: dict):
+        self.require_keys(data, ["UUID", "appliance", "environmental", "occupancy", "expertRecord"])
+
+        self.verify_uuid(data["UUID"])
+        for name in COLUMN_GROUPS.values():
+            self.verify_columns(name, data[name])
+        self.verify_expert_record(data["expertRecord"])
+
+        return True
+
+    def verify_columns(self, name, columns):
+        if not isinstance(columns, dict):
+            raise ValueError(f"{name} must be an object")
+
+        fields = self.COLUMNS[name]
+        self.require_keys(columns, list(fields))
+        length = None
+        for field, check in fields.items():
+            values = columns[field]
+            if not isinstance(values, list):
+                raise ValueError(f"{name}.{field} must be a list")
+            if length is not None and len(values) != length:
+                raise ValueError(f"{name} columns must have the same length")
+            length = len(values)
+
+            verify_value = getattr(self, check)
+            for value in values:
+                verify_value(value)
+
+    def verify_uuid(self, value):
         if not isinstance(value, int):
             raise ValueError(f"uuid must be int, found {type(value)}")
 
@@ -21,66 +69,169 @@ class RawSessionSchemaVerifier:
             raise ValueError("applianceRecords must be a list")
 
         for entry in items:
-            self._require_keys(entry, ["UUID", "timestamp", "current", "voltage",
-                                       "temperature", "appliance_type"])
+            self.require_keys(entry, ["UUID", "timestamp", "current", "voltage",
+                                      "temperature", "appliance_type"])
 
-            self._verify_uuid(entry["UUID"])
-            self._verify_string(entry["timestamp"])
-            self._verify_float(entry["current"])
-            self._verify_float(entry["voltage"])
-            self._verify_float(entry["temperature"])
-            self._verify_string(entry["appliance_type"])
+            self.verify_uuid(entry["UUID"])
+            self.verify_string(entry["timestamp"])
+            self.verify_float(entry["current"])
+            self.verify_float(entry["voltage"])
+            self.verify_float(entry["temperature"])
+            self.verify_string(entry["appliance_type"])
 
     def _verify_environmental_records(self, items):
         if not isinstance(items, list):
             raise ValueError("environmentalRecords must be a list")
 
         for entry in items:
-            self._require_keys(entry, ["UUID", "timestamp", "temperature", "humidity"])
+            self.require_keys(entry, ["UUID", "timestamp", "temperature", "humidity"])
 
-            self._verify_uuid(entry["UUID"])
-            self._verify_string(entry["timestamp"])
-            self._verify_float(entry["temperature"])
-            self._verify_float(entry["humidity"])
+            self.verify_uuid(entry["UUID"])
+            self.verify_string(entry["timestamp"])
+            self.verify_float(entry["temperature"])
+            self.verify_float(entry["humidity"])
 
     def _verify_occupancy_records(self, items):
         if not isinstance(items, list):
             raise ValueError("occupancyRecords must be a list")
 
         for entry in items:
-            self._require_keys(entry, ["UUID", "timestamp", "occupancy"])
+            self.require_keys(entry, ["UUID", "timestamp", "occupancy"])
 
-            self._verify_uuid(entry["UUID"])
-            self._verify_string(entry["timestamp"])
-            self._verify_float(entry["occupancy"])
+            self.verify_uuid(entry["UUID"])
+            self.verify_string(entry["timestamp"])
+            self.verify_float(entry["occupancy"])
 
-    def _verify_expert_record(self, entry):
+    def verify_expert_record(self, entry):
         if not isinstance(entry, dict):
             raise ValueError("expertRecord must be an object")
 
-        self._require_keys(entry, ["UUID", "timestamp", "label"])
+        self.require_keys(entry, ["UUID", "timestamp", "label"])
 
         if entry["UUID"] is not None:
-            self._verify_uuid(entry["UUID"])
+            self.verify_uuid(entry["UUID"])
 
         if entry["timestamp"] is not None:
-            self._verify_string(entry["timestamp"])
+            self.verify_string(entry["timestamp"])
 
         if entry["label"] is not None:
-            self._verify_string(entry["label"])
+            self.verify_string(entry["label"])
 
-    def _verify_string(self, value):
+    def verify_string(self, value):
         if value is not None and not isinstance(value, str):
             raise ValueError(f"String expected, found {type(value)}")
 
-    def _verify_float(self, value):
+    def verify_float(self, value):
         if value is not None and not isinstance(value, (int, float)):
             raise ValueError(f"Number expected, found {type(value)}")
 
-    def _require_keys(self, obj, required):
+    def require_keys(self, obj, required):
         if not isinstance(obj, dict):
             raise ValueError(f"Object expected, found {type(obj)}")
 
         missing = [k for k in required if k not in obj]
         if missing:
             raise ValueError(f"Missing keys: {missing} in {obj}")
+
+
+class FastRawSessionSchemaVerifier(RawSessionSchemaVerifier):
+    # Checks the keys of the records with a single lookup per record and the types a column at a time.
+    # As soon as something is wrong the reference checks are run, so the error messages are the same.
+    # A trusted sender can be verified on a fraction of its records only.
+
+    _NONE = type(None)
+    _INT_TYPES = {int, bool}
+    _FLOAT_TYPES = {int, bool, float, _NONE}
+    _STRING_TYPES = {str, _NONE}
+
+    # record group -> allowed types of each required field
+    _RECORDS = {
+        "applianceRecords": {"UUID": _INT_TYPES, "timestamp": _STRING_TYPES, "current": _FLOAT_TYPES,
+                             "voltage": _FLOAT_TYPES, "temperature": _FLOAT_TYPES,
+                             "appliance_type": _STRING_TYPES},
+        "environmentalRecords": {"UUID": _INT_TYPES, "timestamp": _STRING_TYPES,
+                                 "temperature": _FLOAT_TYPES, "humidity": _FLOAT_TYPES},
+        "occupancyRecords": {"UUID": _INT_TYPES, "timestamp": _STRING_TYPES, "occupancy": _FLOAT_TYPES}
+    }
+    _SESSION_KEYS = {"UUID", "applianceRecords", "environmentalRecords", "occupancyRecords", "expertRecord"}
+    _COLUMNAR_KEYS = {"UUID", "appliance", "environmental", "occupancy", "expertRecord"}
+
+    def __init__(self, sample_ratio=1.0):
+        # 1.0 checks every record, below 1.0 one record every 1 / sample_ratio
+        self.sample_step = max(1, round(1 / sample_ratio)) if sample_ratio > 0 else 0
+        self._getters = {group: itemgetter(*fields) for group, fields in self._RECORDS.items()}
+        self.last_seconds = 0.0
+        self.total_seconds = 0.0
+        self.sessions = 0
+
+    def verify(self, data: dict):
+        start = time.perf_counter()
+        try:
+            if not self._fast_verify(data):
+                # reference checks raise the same error of the slow path
+                super().verify(data)
+        finally:
+            self.last_seconds = time.perf_counter() - start
+            self.total_seconds += self.last_seconds
+            self.sessions += 1
+        return True
+
+    def _fast_verify(self, data):
+        if is_columnar(data):
+            return self._fast_verify_columnar(data)
+
+        if type(data) is not dict or not self._SESSION_KEYS <= data.keys():
+            return False
+        if type(data["UUID"]) not in self._INT_TYPES:
+            return False
+
+        for group, fields in self._RECORDS.items():
+            items = data[group]
+            if type(items) is not list:
+                return False
+            if self.sample_step == 0 or not items:
+                continue
+            if self.sample_step > 1:
+                items = items[::self.sample_step]
+            if not set(map(type, items)) <= {dict}:
+                return False
+            try:
+                rows = list(map(self._getters[group], items))
+            except KeyError:
+                return False
+            for column, allowed in zip(zip(*rows), fields.values()):
+                if not set(map(type, column)) <= allowed:
+                    return False
+
+        return self._fast_verify_expert_record(data["expertRecord"])
+
+    def _fast_verify_columnar(self, data):
+        if not self._COLUMNAR_KEYS <= data.keys() or type(data["UUID"]) not in self._INT_TYPES:
+            return False
+
+        for group, fields in self._RECORDS.items():
+            columns = data[COLUMN_GROUPS[group]]
+            if type(columns) is not dict or not fields.keys() <= columns.keys():
+                return False
+            lengths = set()
+            for field, allowed in fields.items():
+                column = columns[field]
+                if type(column) is not list:
+                    return False
+                lengths.add(len(column))
+                if self.sample_step == 0:
+                    continue
+                if self.sample_step > 1:
+                    column = column[::self.sample_step]
+                if not set(map(type, column)) <= allowed:
+                    return False
+            if len(lengths) > 1:
+                return False
+
+        return self._fast_verify_expert_record(data["expertRecord"])
+
+    def _fast_verify_expert_record(self, entry):
+        return type(entry) is dict and {"UUID", "timestamp", "label"} <= entry.keys() \
+            and type(entry["UUID"]) in self._INT_TYPES | {self._NONE} \
+            and type(entry["timestamp"]) in self._STRING_TYPES \
+            and type(entry["label"]) in self._STRING_TYPES
@@ -0,0 +1,190 @@
+import copy
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from preparation_system.src.cleaner import Cleaner
+from preparation_system.src.extractor import Extractor
+from preparation_system.src.preparation_pipeline import PreparationPipeline
+from preparation_system.src.raw_session_layout import COLUMN_GROUPS
+from preparation_system.src.raw_session_schema_verifier import RawSessionSchemaVerifier, \
+    FastRawSessionSchemaVerifier
+
+LIMITS = {
+    "voltage": {"min": 200, "max": 250},
+    "temperature": {"min": 20, "max": 100},
+    "ex_temperature": {"min": -20, "max": 50},
+    "current": {"min": 0, "max": 20},
+    "humidity": {"min": 0, "max": 100},
+    "occupancy": {"min": 0, "max": 10}
+}
+
+
+# reference checks fused in the pass, or a fast verifier checking every record before it
+PIPELINES = [
+    lambda: PreparationPipeline(LIMITS),
+    lambda: PreparationPipeline(LIMITS, FastRawSessionSchemaVerifier())
+]
+
+
+def reference(raw_session):
+    RawSessionSchemaVerifier().verify(raw_session)
+    cleaner = Cleaner(LIMITS)
+    raw_session = cleaner.correct_missing_samples(raw_session)
+    raw_session = cleaner.correct_outliers(raw_session)
+    return Extractor(raw_session).extract()
+
+
+def random_value(rnd, limit):
+    r = rnd.random()
+    if r < 0.2:
+        return None
+    if r < 0.35:
+        return rnd.uniform(limit["min"] - 100, limit["max"] + 100)
+    if r < 0.4:
+        return rnd.randint(limit["min"], limit["max"])
+    return rnd.uniform(limit["min"], limit["max"])
+
+
+def random_session(rnd, uuid):
+    return {
+        "UUID": uuid,
+        "applianceRecords": [{
+            "UUID": i, "timestamp": "2024-01-01 00:00:00",
+            "current": random_value(rnd, LIMITS["current"]),
+            "voltage": random_value(rnd, LIMITS["voltage"]),
+            "temperature": random_value(rnd, LIMITS["temperature"]),
+            "appliance_type": "fridge"
+        } for i in range(rnd.randint(0, 12))],
+        "environmentalRecords": [{
+            "UUID": i, "timestamp": "2024-01-01 00:00:00",
+            "temperature": random_value(rnd, LIMITS["ex_temperature"]),
+            "humidity": random_value(rnd, LIMITS["humidity"])
+        } for i in range(rnd.randint(0, 12))],
+        "occupancyRecords": [{
+            "UUID": i, "timestamp": "2024-01-01 00:00:00",
+            "occupancy": random_value(rnd, LIMITS["occupancy"])
+        } for i in range(rnd.randint(0, 12))],
+        "expertRecord": {"UUID": uuid, "timestamp": "2024-01-01 00:00:00", "label": "normal"}
+    }
+
+
+def columnar(raw_session):
+    session = {"UUID": raw_session["UUID"], "expertRecord": raw_session["expertRecord"]}
+    for group, name in COLUMN_GROUPS.items():
+        fields = list(RawSessionSchemaVerifier.COLUMNS[name])
+        session[name] = {field: [rec[field] for rec in raw_session[group]] for field in fields}
+    return session
+
+
+def same(a, b):
+    # NaN features (all the samples of a field missing) compare equal
+    return a == b or (isinstance(a, float) and isinstance(b, float) and a != a and b != b)
+
+
+@pytest.mark.parametrize("make_pipeline", PIPELINES)
+def test_pipeline_equals_reference(make_pipeline):
+    rnd = random.Random(42)
+    pipeline = make_pipeline()
+    for uuid in range(500):
+        raw_session = random_session(rnd, uuid)
+        expected = reference(copy.deepcopy(raw_session))
+        prepared = pipeline.prepare(copy.deepcopy(raw_session))
+        assert list(prepared.keys()) == list(expected.keys())
+        for key in expected:
+            assert same(prepared[key], expected[key]), key
+
+
+@pytest.mark.parametrize("make_pipeline", PIPELINES)
+def test_columnar_layout_equals_rows(make_pipeline):
+    rnd = random.Random(7)
+    pipeline = make_pipeline()
+    for uuid in range(500):
+        raw_session = random_session(rnd, uuid)
+        expected = reference(copy.deepcopy(raw_session))
+        RawSessionSchemaVerifier().verify(columnar(raw_session))
+        prepared = pipeline.prepare(columnar(raw_session))
+        assert list(prepared.keys()) == list(expected.keys())
+        for key in expected:
+            assert same(prepared[key], expected[key]), key
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda s: s.pop("occupancy"),
+    lambda s: s["appliance"].update(voltage=["230"]),
+    lambda s: s["appliance"]["current"].append(1.0),
+    lambda s: s["environmental"].pop("humidity"),
+    lambda s: s.update(occupancy=[])
+])
+@pytest.mark.parametrize("make_pipeline", PIPELINES)
+def test_columnar_layout_rejected_like_reference(make_pipeline, corrupt):
+    raw_session = {
+        "UUID": 1,
+        "appliance": {"UUID": [0], "timestamp": ["2024-01-01 00:00:00"], "current": [1.0],
+                      "voltage": [230.0], "temperature": [30.0], "appliance_type": ["fridge"]},
+        "environmental": {"UUID": [0], "timestamp": ["2024-01-01 00:00:00"],
+                          "temperature": [20.0], "humidity": [50.0]},
+        "occupancy": {"UUID": [0], "timestamp": ["2024-01-01 00:00:00"], "occupancy": [2]},
+        "expertRecord": {"UUID": 1, "timestamp": "2024-01-01 00:00:00", "label": "normal"}
+    }
+    corrupt(raw_session)
+
+    with pytest.raises(ValueError) as expected:
+        RawSessionSchemaVerifier().verify(copy.deepcopy(raw_session))
+    with pytest.raises(ValueError) as found:
+        make_pipeline().prepare(copy.deepcopy(raw_session))
+    assert str(found.value) == str(expected.value)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda s: s.pop("occupancyRecords"),
+    lambda s: s.update(UUID="1"),
+    lambda s: s["applianceRecords"][0].update(voltage="230"),
+    lambda s: s["applianceRecords"][0].update(appliance_type=3),
+    lambda s: s["environmentalRecords"][0].pop("humidity"),
+    lambda s: s.update(occupancyRecords={}),
+    lambda s: s["expertRecord"].update(label=1)
+])
+@pytest.mark.parametrize("make_pipeline", PIPELINES)
+def test_pipeline_rejects_like_reference(make_pipeline, corrupt):
+    raw_session = {
+        "UUID": 1,
+        "applianceRecords": [{"UUID": 0, "timestamp": "2024-01-01 00:00:00", "current": 1.0,
+                              "voltage": 230.0, "temperature": 30.0, "appliance_type": "fridge"}],
+        "environmentalRecords": [{"UUID": 0, "timestamp": "2024-01-01 00:00:00",
+                                  "temperature": 20.0, "humidity": 50.0}],
+        "occupancyRecords": [{"UUID": 0, "timestamp": "2024-01-01 00:00:00", "occupancy": 2}],
+        "expertRecord": {"UUID": 1, "timestamp": "2024-01-01 00:00:00", "label": "normal"}
+    }
+    corrupt(raw_session)
+
+    with pytest.raises(ValueError) as expected:
+        reference(copy.deepcopy(raw_session))
+    with pytest.raises(ValueError) as found:
+        make_pipeline().prepare(copy.deepcopy(raw_session))
+    assert str(found.value) == str(expected.value)
+
+
+def test_sampled_verification_times_every_session():
+    verifier = FastRawSessionSchemaVerifier(sample_ratio=0.5)
+    pipeline = PreparationPipeline(LIMITS, verifier)
+    rnd = random.Random(3)
+    for uuid in range(10):
+        pipeline.prepare(random_session(rnd, uuid))
+    assert verifier.sessions == 10
+    assert verifier.total_seconds >= verifier.last_seconds > 0
+
+
+def test_sampled_verification_rejects_unchecked_record():
+    raw_session = random_session(random.Random(5), 1)
+    raw_session["applianceRecords"] = [
+        {"UUID": i, "timestamp": "2024-01-01 00:00:00", "current": 1.0, "voltage": 230.0,
+         "temperature": 30.0, "appliance_type": "fridge"} for i in range(4)
+    ]
+    # the second record is skipped by the sampling
+    raw_session["applianceRecords"][1].pop("voltage")
+    with pytest.raises(ValueError):
+        PreparationPipeline(LIMITS, FastRawSessionSchemaVerifier(sample_ratio=0.5)).prepare(raw_session)
@@ -1,9 +1,12 @@
 """ Module for defining the classifier """
 import io
 import os
+import time
+import warnings
 import joblib
-import pandas as pd
+import numpy as np
 
+from production_system.classifier.numpy_mlp import NumpyMLP
 from production_system.model.label import Label
 from production_system.model.label_type import LabelType
 from production_system.model.prepared_session import PreparedSession
@@ -24,6 +27,8 @@ class Classifier:
     def __init__(self):
         self.filename = None
         self.model = None
+        self.engine = None
+        self.cache = None
 
     def load_from_file(self, filename: str = "classifier.joblib"):
         """ Loads the classifier from a file """
@@ -32,10 +37,12 @@ class Classifier:
         working_dir = os.getcwd()
         full_path = os.path.join(working_dir, "classifier",filename)
         self.model = joblib.load(full_path)
+        self.engine = NumpyMLP.from_model(self.model)
 
     def load_from_bytes(self, raw_bytes: bytes):
         """ Loads the classifier from bytes """
         self.model = joblib.load(io.BytesIO(raw_bytes))
+        self.engine = NumpyMLP.from_model(self.model)
 
     def store(self, filename: str = "classifier.joblib"):
         """Store current model into a .joblib file inside the working directory."""
@@ -52,17 +59,71 @@ class Classifier:
         self.filename = full_path
 
 
+    def predict(self, features: np.ndarray):
+        """ Predicts a (sessions, features) array, on the NumPy engine when available """
+        if self.engine is not None:
+            return self.engine.predict(features)
+        with warnings.catch_warnings():
+            # Models fitted on a DataFrame by older versions get an ndarray with the same column order
+            warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+            return self.model.predict(features)
+
+    def set_cache(self, cache):
+        """ Sets the prediction cache, None to disable it """
+        self.cache = cache
+
+    def predict_sessions(self, prepared_sessions: list):
+        """ Predicts the label types of the prepared sessions, only the ones not cached are inferred """
+        if self.cache is None:
+            features = np.array([session.to_tuple() for session in prepared_sessions], dtype=np.float64)
+            return [LabelType.from_string(str(prediction)) for prediction in self.predict(features)]
+
+        label_types = []
+        missed = {}
+        for i, session in enumerate(prepared_sessions):
+            features = session.to_tuple()
+            key = self.cache.key(features)
+            # Sessions of the same batch with the same key are predicted once
+            label_type = None if key in missed else self.cache.get(key)
+            if label_type is None:
+                missed.setdefault(key, (features, []))[1].append(i)
+            label_types.append(label_type)
+
+        if missed:
+            start = time.perf_counter()
+            predictions = self.predict(np.array([features for features, _ in missed.values()], dtype=np.float64))
+            self.cache.add_inference_time(time.perf_counter() - start)
+            for (key, (_, indexes)), prediction in zip(missed.items(), predictions):
+                label_type = LabelType.from_string(str(prediction))
+                self.cache.put(key, label_type)
+                for i in indexes:
+                    label_types[i] = label_type
+
+        return label_types
+
     def infer(self, prepared_session: PreparedSession):
         """Run inference."""
 
         if self.model is None:
             raise RuntimeError("Classifier model not loaded")
 
-        features = prepared_session.to_tuple()
-        data_frame = pd.DataFrame([features], columns=Classifier.cols)
-        prediction = self.model.predict(data_frame)[0]
-
         return Label(
             uuid=prepared_session.get_uuid(),
-            label_type=LabelType.from_string(str(prediction))
+            label_type=self.predict_sessions([prepared_session])[0]
         )
+
+    def infer_batch(self, prepared_sessions: list):
+        """ Run inference on several prepared sessions with a single predict call """
+
+        if self.model is None:
+            raise RuntimeError("Classifier model not loaded")
+
+        if not prepared_sessions:
+            return []
+
+        label_types = self.predict_sessions(prepared_sessions)
+
+        return [
+            Label(uuid=session.get_uuid(), label_type=label_type)
+            for session, label_type in zip(prepared_sessions, label_types)
+        ]
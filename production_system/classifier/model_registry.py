@@ -0,0 +1,151 @@
+""" Module for hot swapping the classifier without stopping the classification """
+from threading import Lock, Thread
+
+import numpy as np
+
+from production_system.classifier.classifier import Classifier
+
+
+class ModelRegistry:
+    """ Versioned classifiers: new models are loaded in background and swapped in between batches.
+    Deployments and rollbacks are applied in request order, a late load never replaces a later request """
+
+    def __init__(self, history: int = 1):
+        """ Constructor, history is the number of previous versions kept for rollback """
+        self._lock = Lock()
+        self._history = max(1, history)
+        self._active = None
+        self._active_version = None
+        self._active_request = None
+        self._previous = []
+        self._pending = None
+        self._next_version = 0
+        self._shadows = {}
+
+    def set_active(self, classifier: Classifier):
+        """ Sets the classifier in use at startup """
+        with self._lock:
+            self._active = classifier
+            self._active_version = self._new_version()
+            self._active_request = self._active_version
+
+    def _new_version(self):
+        """ Returns the next version number, to be called with the lock held.
+        Rollbacks take a number too, it orders them with the deployments """
+        version = self._next_version
+        self._next_version += 1
+        return version
+
+    def deploy_bytes(self, raw_bytes: bytes):
+        """ Loads and warms up a classifier in background, returns its version """
+        with self._lock:
+            version = self._new_version()
+        loader = Thread(target=self._load, args=(version, raw_bytes), daemon=True)
+        loader.start()
+        return version
+
+    @staticmethod
+    def _load_classifier(raw_bytes):
+        """ Loads a classifier and runs a first inference """
+        classifier = Classifier()
+        classifier.load_from_bytes(raw_bytes)
+        # Warm up, the first prediction allocates the buffers
+        classifier.predict(np.zeros((1, len(Classifier.cols)), dtype=np.float64))
+        return classifier
+
+    def _load(self, version, raw_bytes):
+        """ Loads a classifier, then marks it as pending """
+        try:
+            classifier = self._load_classifier(raw_bytes)
+        except Exception as exc:
+            print(f"[MODEL REGISTRY] Deployment of version {version} failed: {exc}")
+            return
+
+        with self._lock:
+            # A deployment or rollback requested later may already be in use or waiting
+            if version < self._active_request or (self._pending is not None and version < self._pending[0]):
+                print(f"[MODEL REGISTRY] Version {version} superseded, discarded")
+                return
+            self._set_pending(version, version, classifier, False)
+        print(f"[MODEL REGISTRY] Version {version} ready")
+
+    def _set_pending(self, request, version, classifier, is_rollback):
+        """ Replaces the pending classifier, to be called with the lock held.
+        A replaced rollback goes back to the history, a replaced deployment was never used """
+        if self._pending is not None and self._pending[3]:
+            self._previous.append(self._pending[1:3])
+            del self._previous[:-self._history]
+        self._pending = (request, version, classifier, is_rollback)
+
+    def swap_if_pending(self):
+        """ Puts the pending classifier in use, returns True if the classifier changed.
+        The current one is kept in the history, so a rollback can be undone by another rollback """
+        with self._lock:
+            if self._pending is None:
+                return False
+            request, version, classifier, _ = self._pending
+            if self._active is not None:
+                self._previous.append((self._active_version, self._active))
+                del self._previous[:-self._history]
+            self._active_version, self._active = version, classifier
+            self._active_request = request
+            self._pending = None
+            return True
+
+    def rollback(self):
+        """ Schedules the previous classifier for the next swap, returns its version or None.
+        It replaces any deployment requested before it """
+        with self._lock:
+            if not self._previous:
+                return None
+            version, classifier = self._previous.pop()
+            self._set_pending(self._new_version(), version, classifier, True)
+            return version
+
+    def get_active(self):
+        """ Returns the classifier in use """
+        with self._lock:
+            return self._active
+
+    def get_active_version(self):
+        """ Returns the version of the classifier in use """
+        with self._lock:
+            return self._active_version
+
+    def deploy_shadow_bytes(self, name: str, raw_bytes: bytes):
+        """ Loads a shadow classifier in background, it replaces any shadow with the same name """
+        loader = Thread(target=self._load_shadow, args=(name, raw_bytes), daemon=True)
+        loader.start()
+
+    def _load_shadow(self, name, raw_bytes):
+        """ Loads a shadow classifier and adds it to the shadows """
+        try:
+            classifier = self._load_classifier(raw_bytes)
+        except Exception as exc:
+            print(f"[MODEL REGISTRY] Deployment of shadow {name} failed: {exc}")
+            return
+
+        self.add_shadow(name, classifier)
+        print(f"[MODEL REGISTRY] Shadow {name} ready")
+
+    def add_shadow(self, name: str, classifier: Classifier):
+        """ Adds a loaded shadow classifier """
+        with self._lock:
+            shadows = dict(self._shadows)
+            shadows[name] = classifier
+            self._shadows = shadows
+
+    def remove_shadow(self, name: str):
+        """ Removes a shadow classifier, returns False if not present """
+        with self._lock:
+            if name not in self._shadows:
+                return False
+            shadows = dict(self._shadows)
+            del shadows[name]
+            self._shadows = shadows
+            return True
+
+    def get_shadows(self):
+        """ Returns the shadow classifiers by name, the dict is never modified afterwards """
+        with self._lock:
+            return self._shadows
@@ -0,0 +1,113 @@
+""" Module for running MLPClassifier inference directly on NumPy arrays """
+import numpy as np
+
+
+def _relu(values):
+    """ In place ReLU """
+    np.maximum(values, 0, out=values)
+
+
+def _tanh(values):
+    """ In place tanh """
+    np.tanh(values, out=values)
+
+
+def _logistic(values):
+    """ In place logistic sigmoid """
+    np.negative(values, out=values)
+    np.exp(values, out=values)
+    values += 1
+    np.reciprocal(values, out=values)
+
+
+def _identity(values):
+    """ Identity, nothing to do """
+
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+    "identity": _identity
+}
+
+# Typical range of every feature, used to build the probe set checked on load
+PROBE_RANGES = [
+    (0.0, 20.0),      # mean_current
+    (200.0, 250.0),   # mean_voltage
+    (20.0, 100.0),    # mean_temperature
+    (-20.0, 50.0),    # mean_external_temperature
+    (0.0, 100.0),     # mean_external_humidity
+    (0.0, 10.0)       # mean_occupancy
+]
+
+
+class NumpyMLP:
+    """ Forward pass of a fitted MLPClassifier on preallocated buffers """
+
+    def __init__(self, model, max_batch: int = 64):
+        """ Extracts weights, activations and classes of a fitted MLPClassifier """
+        if model.activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation {model.activation}")
+        binary = model.out_activation_ == "logistic" and model.n_outputs_ == 1
+        if not binary and model.out_activation_ != "softmax":
+            raise ValueError(f"Unsupported output {model.out_activation_} with {model.n_outputs_} outputs")
+
+        self._coefs = [np.ascontiguousarray(coef, dtype=np.float64) for coef in model.coefs_]
+        self._intercepts = [np.asarray(intercept, dtype=np.float64) for intercept in model.intercepts_]
+        self._activation = ACTIVATIONS[model.activation]
+        self._binary = binary
+        self._classes = np.asarray(model.classes_)
+        self._buffers = []
+        self._allocate(max_batch)
+
+    def _allocate(self, max_batch: int):
+        """ Allocates one output buffer per layer """
+        self._max_batch = max_batch
+        self._buffers = [np.empty((max_batch, coef.shape[1]), dtype=np.float64) for coef in self._coefs]
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """ Predicts the classes of a (samples, features) array """
+        rows = features.shape[0]
+        if rows > self._max_batch:
+            self._allocate(max(rows, 2 * self._max_batch))
+
+        values = features
+        last = len(self._coefs) - 1
+        for i, (coef, intercept) in enumerate(zip(self._coefs, self._intercepts)):
+            out = self._buffers[i][:rows]
+            np.matmul(values, coef, out=out)
+            out += intercept
+            if i != last:
+                self._activation(out)
+            values = out
+
+        # The output activation is monotonic, the decision is taken on the logits
+        if self._binary:
+            return self._classes[(values[:, 0] > 0).astype(np.intp)]
+        return self._classes[np.argmax(values, axis=1)]
+
+    def matches(self, model, samples: int = 512, seed: int = 0) -> bool:
+        """ Checks that the predictions match model.predict on a probe set """
+        if model.coefs_[0].shape[0] != len(PROBE_RANGES):
+            return False
+        rng = np.random.default_rng(seed)
+        low = np.array([r[0] for r in PROBE_RANGES])
+        high = np.array([r[1] for r in PROBE_RANGES])
+        probe = rng.uniform(low, high, size=(samples, len(PROBE_RANGES)))
+        return bool(np.array_equal(self.predict(probe), model.predict(probe)))
+
+    @staticmethod
+    def from_model(model):
+        """ Returns the engine of a model, None if the model is not supported or the check fails """
+        try:
+            engine = NumpyMLP(model)
+        except (AttributeError, ValueError) as exc:
+            print(f"[CLASSIFIER] NumPy inference not available: {exc}")
+            return None
+
+        if not engine.matches(model):
+            print("[CLASSIFIER] NumPy inference does not match the model, using model.predict")
+            return None
+
+        return engine
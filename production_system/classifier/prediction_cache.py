@@ -0,0 +1,69 @@
+""" Module for caching the predictions of the classifier """
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class PredictionCache:
+    """ LRU cache with expiration of the predicted label types, keyed on the quantized features """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 600, precision: int = 2):
+        """ Constructor, precision is the number of decimals kept of every feature """
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._precision = precision
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._inference_seconds = 0.0
+
+    def key(self, features: tuple):
+        """ Quantized features """
+        return tuple(round(feature, self._precision) for feature in features)
+
+    def get(self, key):
+        """ Returns the cached label type, None if missing or expired """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                label_type, stored = entry
+                if time.monotonic() - stored <= self._ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return label_type
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, label_type):
+        """ Caches a label type, evicting the least recently used one if full """
+        with self._lock:
+            self._entries[key] = (label_type, time.monotonic())
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def add_inference_time(self, seconds: float):
+        """ Accounts the time spent predicting the missed sessions """
+        with self._lock:
+            self._inference_seconds += seconds
+
+    def clear(self):
+        """ Removes every entry, to be called when the model changes """
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """ Returns hits, misses, hit ratio and inference time saved (estimated on the misses) """
+        with self._lock:
+            lookups = self._hits + self._misses
+            per_miss = self._inference_seconds / self._misses if self._misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "avg_inference_ms": per_miss * 1000,
+                "saved_ms": self._hits * per_miss * 1000
+            }
@@ -1,11 +1,17 @@
 """ Classification System main class"""
 
+from pathlib import Path
+from queue import Queue
 from threading import Thread
 import jsonschema
 
 from production_system.config.configuration_controller import ConfigurationController
 from production_system.classifier.classifier import Classifier
+from production_system.classifier.model_registry import ModelRegistry
+from production_system.classifier.prediction_cache import PredictionCache
 from production_system.messaging.msg_json import MessagingJsonController
+from production_system.messaging.pooled_transport import PooledTransport
+from production_system.messaging.wire_format import WireFormat
 from production_system.model.prepared_session import PreparedSession
 from production_system.errorlog.error_logger import ErrorLogger
 
@@ -20,22 +26,44 @@ class ClassificationSystem:
         self._conf = None
         self._msg_controller = None
         self._classifier = None
+        self._model_registry = None
+        self._store_queue = None
+        self._prediction_cache = None
+        self._cache_stats_period = 0
+        self._cache_sessions = 0
         self._session_counter = None
         self._current_session = None
         self._error_logger = None
         self._test_service_flag = True
+        self._batch_enabled = False
+        self._batch_max_size = 1
+        self._batch_max_wait = 0
+        self._batch_size = 1
 
     def setup_configuration_controller(self):
         """ Setup configuration controller """
         self._conf = ConfigurationController()
         self._conf.import_config()
 
+        # Keep-alive connection pools towards the other systems
+        http_pool = self._conf.get_sys_params().get("http_pool", {})
+        PooledTransport.get_instance().configure(
+            http_pool.get("pool_connections", 4),
+            http_pool.get("pool_maxsize", 8)
+        )
+
+        # MessagePack towards the systems decoding it, JSON otherwise
+        WireFormat.get_instance().configure(self._conf.get_sys_params().get("wire_format", "json"))
+
     def setup_listener(self, ip_add, port):
         """ Setup listener thread """
 
         # Reference to msg_controller
         self._msg_controller = MessagingJsonController.get_instance()
 
+        # Deployed classifiers go to the registry, if any
+        self._msg_controller.set_model_registry(self._model_registry)
+
         # Start listener on specified ip:port
         listener = Thread(target=self._msg_controller.listener, args=(ip_add, port))
         listener.daemon = True
@@ -48,6 +76,54 @@ class ClassificationSystem:
             self._classifier = Classifier()
             self._classifier.load_from_file()
 
+            # New classifiers are swapped in without stopping the classification
+            self._model_registry = ModelRegistry(self._conf.get_sys_params().get("model_history", 1))
+            self._model_registry.set_active(self._classifier)
+
+            # Swapped classifiers are written to disk out of the classification loop
+            self._store_queue = Queue()
+            store_worker = Thread(target=self.store_classifiers)
+            store_worker.daemon = True
+            store_worker.start()
+
+            # Shadow classifiers already in the classifier directory
+            for filename in self._conf.get_sys_params().get("shadow_models", []):
+                shadow = Classifier()
+                shadow.load_from_file(filename)
+                self._model_registry.add_shadow(Path(filename).stem, shadow)
+
+            self.setup_prediction_cache()
+
+    def setup_prediction_cache(self):
+        """ Setup the cache of the primary classifier predictions, disabled if not configured """
+        cache_conf = self._conf.get_sys_params().get("prediction_cache", {})
+        if not cache_conf.get("enabled", False):
+            return
+
+        # Sessions whose features are equal up to the precision get the same label
+        self._prediction_cache = PredictionCache(
+            cache_conf.get("max_entries", 4096),
+            cache_conf.get("ttl_seconds", 600),
+            cache_conf.get("precision", 2)
+        )
+        self._cache_stats_period = cache_conf.get("stats_period", 1000)
+        self._classifier.set_cache(self._prediction_cache)
+
+    def report_prediction_cache(self, sessions):
+        """ Prints the prediction cache stats every stats_period sessions """
+        if self._prediction_cache is None or self._cache_stats_period <= 0:
+            return
+
+        self._cache_sessions += sessions
+        if self._cache_sessions < self._cache_stats_period:
+            return
+        self._cache_sessions = 0
+
+        stats = self._prediction_cache.get_stats()
+        print(f"[CLASSIFICATION SYSTEM] Prediction cache: {stats['entries']} entries, "
+              f"hit ratio {stats['hit_ratio']:.2%} ({stats['hits']} hits, {stats['misses']} misses), "
+              f"{stats['saved_ms']:.1f} ms saved")
+
     def setup_logger(self):
         """ Setup logger"""
         self._error_logger = ErrorLogger()
@@ -105,11 +181,167 @@ class ClassificationSystem:
                 self._session_counter = 0
                 print("[CLASSIFICATION SYSTEM] Switched to production phase")
 
+    def send_label(self, label):
+        """ Sends a label to its receivers and updates the session """
+
+        # Differentiate between Production / Evaluation phase
+
+        # In evaluation phase send label to Evaluation System
+        if self._current_session == self.PHASE_EVALUATION:
+            # Send label
+            eval_sys = self._conf.get_addresses()["evaluation_system"]
+            MessagingJsonController.send(
+                eval_sys["ip"],
+                eval_sys["port"],
+                "/label/classifier",
+                label.to_dict()
+            )
+
+        # Always send to final client
+        if not self._test_service_flag:
+            cli_sys = self._conf.get_addresses()["client_side_system"]
+            MessagingJsonController.send(
+                cli_sys["ip"],
+                cli_sys["port"],
+                "/fault_risk",
+                label.to_dict()
+            )
+        else:
+            print(f"(TEST) SENDING TO INGESTION:\n{label.to_dict()}")
+            ing_sys = self._conf.get_addresses()["ingestion_system"]
+            msg = {'uuid': label.get_uuid()}
+
+            try:
+                MessagingJsonController.send(
+                    ing_sys["ip"],
+                    ing_sys["port"],
+                    "/test_stop",
+                    msg
+                )
+            except Exception as send_exc:
+                print(f"[TEST] ERROR Sending to ingestion: {send_exc}")
+
+        # Update session
+        self.update_phase()
+
+    def swap_classifier(self):
+        """ Puts in use the classifier deployed in the meantime, between two batches """
+        if self._model_registry is None or not self._model_registry.swap_if_pending():
+            return
+
+        self._classifier = self._model_registry.get_active()
+
+        # The cached predictions belong to the previous classifier
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+            self._classifier.set_cache(self._prediction_cache)
+
+        print(f"[CLASSIFICATION SYSTEM] Classifier version "
+              f"{self._model_registry.get_active_version()} in use")
+
+        # Keep the classifier in use across restarts
+        self._store_queue.put(self._classifier)
+
+    def store_classifiers(self):
+        """ Stores the swapped classifiers in order, a joblib dump would stall the classification """
+        while True:
+            classifier = self._store_queue.get()
+            try:
+                classifier.store()
+            except Exception as store_exc:
+                print(f"[CLASSIFICATION SYSTEM] Classifier store error: {store_exc}")
+                self._error_logger.log(f"Classifier store error: {store_exc}")
+
+    def infer_shadows(self, prep_sessions):
+        """ Labels of the shadow classifiers, a single inference per classifier """
+        if self._model_registry is None:
+            return {}
+
+        shadow_labels = {}
+        for name, shadow in self._model_registry.get_shadows().items():
+            try:
+                shadow_labels[name] = shadow.infer_batch(prep_sessions)
+            except Exception as shadow_exc:
+                print(f"[CLASSIFICATION SYSTEM] Shadow {name} error: {shadow_exc}")
+                self._error_logger.log(f"Shadow {name} error: {shadow_exc}")
+        return shadow_labels
+
+    def send_shadow_labels(self, shadow_labels):
+        """ Sends the shadow labels, of sessions in evaluation phase, to the Evaluation System """
+        eval_sys = self._conf.get_addresses()["evaluation_system"]
+        for name, labels in shadow_labels.items():
+            MessagingJsonController.send(
+                eval_sys["ip"],
+                eval_sys["port"],
+                f"/label/shadow/{name}",
+                [label.to_dict() for label in labels]
+            )
+
+    def setup_batch_inference(self):
+        """ Setup micro-batched inference, disabled if not configured """
+        batch_conf = self._conf.get_sys_params().get("inference_batch", {})
+        self._batch_enabled = batch_conf.get("enabled", False)
+        self._batch_max_size = max(1, batch_conf.get("max_size", 32))
+        self._batch_max_wait = batch_conf.get("max_wait_ms", 5) / 1000
+        self._batch_size = 1
+
+    def classify_batch(self):
+        """ Classifies a batch of prepared sessions with a single inference """
+
+        # Batch size adapts to the load: doubled when the batch fills up, halved when under half full
+        # Waiting at most max_wait after the first session keeps the single session latency bounded
+        messages = self._msg_controller.receive_batch(self._batch_size, self._batch_max_wait)
+        if len(messages) >= self._batch_size:
+            self._batch_size = min(self._batch_size * 2, self._batch_max_size)
+        elif len(messages) < self._batch_size / 2:
+            self._batch_size = max(self._batch_size // 2, 1)
+
+        prep_sessions = []
+        for prepared_session_json in messages:
+
+            # Discard any other type of message
+            if not isinstance(prepared_session_json, dict):
+                print("[CLASSIFICATION SYSTEM] [PROD/EVAL] Unexpected message discarded")
+                self._error_logger.log("[PROD/EVAL] unexpected message discarded")
+                continue
+
+            try:
+                # Validate schema and create object
+                prep_sessions.append(PreparedSession.from_json(prepared_session_json))
+            except jsonschema.exceptions.ValidationError as val_exc:
+                print(f"[CLASSIFICATION SYSTEM] [PROD/EVAL] Validation error: {val_exc}")
+                self._error_logger.log(f"[PROD/EVAL] json validation error: {val_exc}")
+
+        if not prep_sessions:
+            return
+
+        try:
+            # Infer classifier
+            labels = self._classifier.infer_batch(prep_sessions)
+            print(f"[CLASSIFICATION SYSTEM] {len(labels)} labels calculated")
+            self.report_prediction_cache(len(labels))
+
+            # Fan out, in receive order
+            evaluated = []
+            for prep_session, label in zip(prep_sessions, labels):
+                if self._current_session == self.PHASE_EVALUATION:
+                    evaluated.append(prep_session)
+                self.send_label(label)
+
+            # Only the primary label reaches the client, shadow ones are evaluated
+            if evaluated:
+                self.send_shadow_labels(self.infer_shadows(evaluated))
+
+        except Exception as gen_exc:
+            print(f"General error: {gen_exc}")
+            self._error_logger.log(f"General error: {gen_exc}")
+
     def run(self):
         """ Main loop """
 
         # Setup whole system
         self.setup()
+        self.setup_batch_inference()
 
         # Start loop
         while True:
@@ -155,8 +387,14 @@ class ClassificationSystem:
                     print(f"General error: {gen_exc}")
                     self._error_logger.log(f"General error: {gen_exc}")
 
+            # Production / Evaluation phase, micro-batched
+            elif self._batch_enabled:
+                self.swap_classifier()
+                self.classify_batch()
+
             # Production / Evaluation phase
             else:
+                self.swap_classifier()
 
                 # Wait for prepared session
                 prepared_session_json = self._msg_controller.receive()
@@ -173,46 +411,15 @@ class ClassificationSystem:
                     label = self._classifier.infer(prep_session)
                     print(f"[CLASSIFICATION SYSTEM] \
                     Label calculated: {str(label.get_label_type())}")
+                    self.report_prediction_cache(1)
 
-                    # Differentiate between Production / Evaluation phase
-
-                    # In evaluation phase send label to Evaluation System
-                    if self._current_session == self.PHASE_EVALUATION:
-                        # Send label
-                        eval_sys = self._conf.get_addresses()["evaluation_system"]
-                        MessagingJsonController.send(
-                            eval_sys["ip"],
-                            eval_sys["port"],
-                            "/label/classifier",
-                            label.to_dict()
-                        )
+                    # Send label and update session
+                    in_evaluation = self._current_session == self.PHASE_EVALUATION
+                    self.send_label(label)
 
-                    # Always send to final client
-                    if not self._test_service_flag:
-                        cli_sys = self._conf.get_addresses()["client_side_system"]
-                        MessagingJsonController.send(
-                            cli_sys["ip"],
-                            cli_sys["port"],
-                            "/fault_risk",
-                            label.to_dict()
-                        )
-                    else:
-                        print(f"(TEST) SENDING TO INGESTION:\n{label.to_dict()}")
-                        ing_sys = self._conf.get_addresses()["ingestion_system"]
-                        msg = {'uuid': label.get_uuid()}
-
-                        try:
-                            MessagingJsonController.send(
-                                ing_sys["ip"],
-                                ing_sys["port"],
-                                "/test_stop",
-                                msg
-                            )
-                        except Exception as send_exc:
-                            print(f"[TEST] ERROR Sending to ingestion: {send_exc}")
-
-                    # Update session
-                    self.update_phase()
+                    # Shadow labels go to the Evaluation System only
+                    if in_evaluation:
+                        self.send_shadow_labels(self.infer_shadows([prep_session]))
 
                 # Discard any other type of message
                 except jsonschema.exceptions.ValidationError as val_exc:
@@ -2,11 +2,13 @@
 import os
 import json
 import queue
+import time
 from datetime import datetime
 from flask import Flask, request
-from requests import post, exceptions
+from requests import exceptions
 
 from production_system.classifier.classifier import Classifier
+from production_system.messaging.wire_format import WireFormat, WireRequest
 
 
 class MessagingJsonController:
@@ -17,9 +19,14 @@ class MessagingJsonController:
         """ Constructor """
         # Flask instance to receive data
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
 
         self._queue = queue.Queue()
 
+        # Set in production: deployed classifiers go to the registry instead of the queue
+        self._model_registry = None
+
     @staticmethod
     def get_instance():
         """ Returns instance of MessagingController """
@@ -48,6 +55,29 @@ class MessagingJsonController:
         """ Return message from queue """
         return self._queue.get(block=block, timeout=timeout)
 
+    def receive_batch(self, max_items, max_wait):
+        """ Return up to max_items messages, waiting at most max_wait seconds after the first one """
+        batch = [self._queue.get(block=True)]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(block=True, timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def set_model_registry(self, model_registry):
+        """ Set the registry receiving the deployed classifiers """
+        self._model_registry = model_registry
+
+    def get_model_registry(self):
+        """ Get the registry receiving the deployed classifiers """
+        return self._model_registry
+
     def enqueue(self, data):
         """ Put received data into queue """
         # save received message into queue
@@ -55,11 +85,11 @@ class MessagingJsonController:
 
     @staticmethod
     def send(ip, port, endpoint, data):
-        """ Send JSON data to given endpoint """
+        """ Send data to given endpoint, MessagePack if configured, JSON otherwise """
         url = f'http://{ip}:{port}/' + endpoint
         response = None
         try:
-            response = post(url, json=data, timeout=10.0)
+            response = WireFormat.get_instance().post(url, data, timeout=10.0)
         except exceptions.RequestException:
             print("Endpoint system unreachable")
             return False
@@ -110,6 +140,12 @@ def receive_classifier():
     # Read bytes
     file_bytes = uploaded_file.read()
 
+    # In production the classifier is loaded in background and swapped in between batches
+    model_registry = MessagingJsonController.get_instance().get_model_registry()
+    if model_registry is not None:
+        version = model_registry.deploy_bytes(file_bytes)
+        return {"version": version}, 200
+
     # Create classifier, load via passed bytes
     clf = Classifier()
     clf.load_from_bytes(file_bytes)
@@ -119,6 +155,45 @@ def receive_classifier():
 
     return {}, 200
 
+@app.post("/deploy/shadow/<name>")
+def receive_shadow_classifier(name):
+    """ Receive a classifier to be run in shadow of the one in use """
+
+    model_registry = MessagingJsonController.get_instance().get_model_registry()
+    if model_registry is None:
+        return {"error": "No model registry in development phase"}, 400
+
+    if "file" not in request.files:
+        return {"error": "No file part"}, 400
+
+    model_registry.deploy_shadow_bytes(name, request.files["file"].read())
+
+    return {}, 200
+
+@app.delete("/deploy/shadow/<name>")
+def remove_shadow_classifier(name):
+    """ Stop running a shadow classifier """
+
+    model_registry = MessagingJsonController.get_instance().get_model_registry()
+    if model_registry is None or not model_registry.remove_shadow(name):
+        return {"error": f"No shadow classifier {name}"}, 404
+
+    return {}, 200
+
+@app.post("/rollback")
+def rollback_classifier():
+    """ Go back to the previous classifier """
+
+    model_registry = MessagingJsonController.get_instance().get_model_registry()
+    if model_registry is None:
+        return {"error": "No model registry in development phase"}, 400
+
+    version = model_registry.rollback()
+    if version is None:
+        return {"error": "No previous classifier"}, 409
+
+    return {"version": version}, 200
+
 @app.post("/prepared_session")
 def receive_prepared_session():
     """ Receive prepared session """
@@ -131,3 +206,19 @@ def receive_prepared_session():
 
     # Return ok
     return {}, 200
+
+@app.post("/prepared_sessions")
+def receive_prepared_sessions():
+    """ Receive a batch of prepared sessions """
+
+    # Extract JSON payload
+    received_prepared_sessions = request.json
+    if not isinstance(received_prepared_sessions, list):
+        return {"error": "No JSON array received"}, 400
+
+    # Put every session into queue, in order
+    for received_prepared_session in received_prepared_sessions:
+        MessagingJsonController.get_instance().enqueue(received_prepared_session)
+
+    # Return ok
+    return {}, 200
@@ -0,0 +1,110 @@
+""" Module for the encoding of the messages, MessagePack or JSON """
+from urllib.parse import urlsplit
+
+import requests
+from flask import Request
+from werkzeug.exceptions import UnsupportedMediaType
+
+from production_system.messaging.pooled_transport import PooledTransport
+
+try:
+    import msgpack
+except ImportError:
+    # optional, messages are sent and accepted as JSON only
+    msgpack = None
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+class WireRequest(Request):
+    """
+    Flask request whose json also decodes MessagePack bodies, selected by the Content-Type
+    """
+
+    _msgpack_body = None
+
+    def get_json(self, force=False, silent=False, cache=True):
+        """
+        Gets the decoded body, JSON unless the Content-Type is MessagePack
+        :param force: bool
+        :param silent: bool
+        :param cache: bool
+        :return: Any
+        """
+        if self.mimetype != MSGPACK_MIMETYPE:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack not supported")
+
+        body = self._msgpack_body
+        if body is None:
+            try:
+                body = msgpack.unpackb(self.get_data(cache=cache), raw=False)
+            except (ValueError, msgpack.UnpackException) as e:
+                if silent:
+                    return None
+                return self.on_json_loading_failed(e)
+            if cache:
+                self._msgpack_body = body
+        return body
+
+
+class WireFormat:
+    """
+    Encoding of the outgoing messages: MessagePack when configured, JSON towards the destinations
+    answering 415 and when msgpack is not installed
+    """
+
+    _instance = None
+
+    use_msgpack: bool
+    """
+    True if the messages are encoded with MessagePack
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.use_msgpack = False
+        self._json_only = set()
+
+    @staticmethod
+    def get_instance():
+        """
+        Gets the shared instance
+        :return: WireFormat
+        """
+        if WireFormat._instance is None:
+            WireFormat._instance = WireFormat()
+        return WireFormat._instance
+
+    def configure(self, wire_format: str):
+        """
+        Sets the encoding of the outgoing messages
+        :param wire_format: str "msgpack" or "json"
+        :return: None
+        """
+        if wire_format == "msgpack" and msgpack is None:
+            print("[WARN] msgpack not installed, messages are sent as JSON")
+        self.use_msgpack = wire_format == "msgpack" and msgpack is not None
+
+    def post(self, url: str, data, timeout: float) -> requests.Response:
+        """
+        Sends data with a POST request, same return value and exceptions as PooledTransport.post
+        :param url: str
+        :param data: dict | list
+        :param timeout: float
+        :return: requests.Response
+        """
+        transport = PooledTransport.get_instance()
+        parts = urlsplit(url)
+        destination = f"{parts.scheme}://{parts.netloc}"
+        if self.use_msgpack and destination not in self._json_only:
+            response = transport.post(url, data=msgpack.packb(data), timeout=timeout,
+                                      headers={"Content-Type": MSGPACK_MIMETYPE})
+            if response.status_code != 415:
+                return response
+            # the destination only decodes JSON, from now on it gets JSON
+            self._json_only.add(destination)
+        return transport.post(url, json=data, timeout=timeout)
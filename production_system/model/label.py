@@ -1,6 +1,6 @@
 """ Module for defining labels """
-import jsonschema
 from production_system.model.label_type import LabelType
+from production_system.model.schema_validator import compile_validator, validate
 
 
 class Label:
@@ -29,7 +29,7 @@ class Label:
         """
 
         # Schema validation
-        jsonschema.validate(instance=data, schema=Label.RECEIVED_LABEL_SCHEMA)
+        validate(_RECEIVED_LABEL_VALIDATOR, data)
 
         # Mapping case-insensitive
         label_type_enum = LabelType.from_string(data["type"])
@@ -53,3 +53,6 @@ class Label:
     def get_uuid(self):
         """ Returns the UUID """
         return self._uuid
+
+
+_RECEIVED_LABEL_VALIDATOR = compile_validator(Label.RECEIVED_LABEL_SCHEMA)
@@ -1,5 +1,6 @@
 """ Module for defining a prepared session """
 import jsonschema
+from production_system.model.schema_validator import compile_validator, validate
 
 class PreparedSession:
     """ Class for managing a prepared session """
@@ -45,7 +46,7 @@ class PreparedSession:
         Performs a validation against the preset JSON schema (PREPARED_SESSION_SCHEMA)
         """
         try:
-            jsonschema.validate(instance=data, schema=PreparedSession.PREPARED_SESSION_SCHEMA)
+            validate(_PREPARED_SESSION_VALIDATOR, data)
         except jsonschema.exceptions.ValidationError as exc:
             raise jsonschema.exceptions.ValidationError(
                 f"Invalid PreparedSession JSON\nSchema: \
@@ -106,3 +107,6 @@ class PreparedSession:
     def get_uuid(self):
         """ Gets the UUID of the prepared session """
         return self._uuid
+
+
+_PREPARED_SESSION_VALIDATOR = compile_validator(PreparedSession.PREPARED_SESSION_SCHEMA)
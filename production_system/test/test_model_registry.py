@@ -0,0 +1,131 @@
+""" Tests of the ordering of deployments, swaps and rollbacks of the model registry """
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from production_system.classifier import model_registry
+from production_system.classifier.model_registry import ModelRegistry
+
+
+class DeferredThread:
+    """ Loader thread run by the test, to choose the order in which the loads complete """
+
+    def __init__(self, target, args, daemon):
+        self.target = target
+        self.args = args
+        self.daemon = daemon
+
+    def start(self):
+        """ Queues the load """
+        LOADS.append(self)
+
+    def run(self):
+        """ Completes the load """
+        self.target(*self.args)
+
+
+LOADS = []
+
+
+@pytest.fixture(name="registry")
+def fixture_registry(monkeypatch):
+    """ Registry whose loads complete on demand, the loaded classifier is the deployed bytes """
+    LOADS.clear()
+    monkeypatch.setattr(model_registry, "Thread", DeferredThread)
+    monkeypatch.setattr(ModelRegistry, "_load_classifier", staticmethod(lambda raw_bytes: raw_bytes))
+    registry = ModelRegistry(history=2)
+    registry.set_active(b"v0")
+    return registry
+
+
+def test_deploy_swapped_between_batches(registry):
+    """ A loaded classifier is used only after the swap """
+    assert registry.deploy_bytes(b"v1") == 1
+    LOADS[0].run()
+    assert registry.get_active() == b"v0"
+    assert registry.swap_if_pending()
+    assert (registry.get_active(), registry.get_active_version()) == (b"v1", 1)
+    assert not registry.swap_if_pending()
+
+
+def test_late_load_does_not_replace_newer_active(registry):
+    """ An older deployment completing after a newer one is in use is discarded """
+    registry.deploy_bytes(b"v1")
+    registry.deploy_bytes(b"v2")
+    LOADS[1].run()
+    registry.swap_if_pending()
+    LOADS[0].run()
+    assert not registry.swap_if_pending()
+    assert registry.get_active() == b"v2"
+
+
+def test_late_load_does_not_replace_newer_pending(registry):
+    """ An older deployment completing after a newer one is waiting is discarded """
+    registry.deploy_bytes(b"v1")
+    registry.deploy_bytes(b"v2")
+    LOADS[1].run()
+    LOADS[0].run()
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v2"
+
+
+def test_rollback_wins_over_earlier_deploy(registry):
+    """ A deployment requested before the rollback does not replace it """
+    registry.deploy_bytes(b"v1")
+    LOADS[0].run()
+    registry.swap_if_pending()
+    registry.deploy_bytes(b"v2")
+    assert registry.rollback() == 0
+    LOADS[1].run()
+    registry.swap_if_pending()
+    assert (registry.get_active(), registry.get_active_version()) == (b"v0", 0)
+
+
+def test_deploy_after_rollback_keeps_rolled_back_model(registry):
+    """ A deployment requested after the rollback replaces it, the previous model stays in the history """
+    registry.deploy_bytes(b"v1")
+    LOADS[0].run()
+    registry.swap_if_pending()
+    registry.rollback()
+    registry.deploy_bytes(b"v3")
+    LOADS[1].run()
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v3"
+    assert registry.rollback() == 1
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v1"
+    assert registry.rollback() == 3
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v3"
+
+
+def test_rollback_keeps_current_in_history(registry):
+    """ A rollback can be undone by another rollback """
+    registry.deploy_bytes(b"v1")
+    LOADS[0].run()
+    registry.swap_if_pending()
+    assert registry.rollback() == 0
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v0"
+    assert registry.rollback() == 1
+    registry.swap_if_pending()
+    assert registry.get_active() == b"v1"
+
+
+def test_rollback_without_history(registry):
+    """ Nothing to go back to at startup """
+    assert registry.rollback() is None
+    assert not registry.swap_if_pending()
+
+
+def test_failed_load_keeps_current(registry, monkeypatch):
+    """ A classifier that cannot be loaded is never swapped in """
+    def fail(raw_bytes):
+        raise ValueError(f"corrupted {raw_bytes}")
+    monkeypatch.setattr(ModelRegistry, "_load_classifier", staticmethod(fail))
+    registry.deploy_bytes(b"v1")
+    LOADS[0].run()
+    assert not registry.swap_if_pending()
+    assert registry.get_active() == b"v0"
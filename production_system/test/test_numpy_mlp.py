@@ -0,0 +1,43 @@
+""" Tests of the NumPy forward pass of MLPClassifier """
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.neural_network import MLPClassifier
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from production_system.classifier.numpy_mlp import NumpyMLP, PROBE_RANGES
+
+
+def fit(activation, classes, hidden_layer_sizes=(8, 4)):
+    """ Fits a small MLPClassifier on random features in the probe ranges """
+    rng = np.random.default_rng(1)
+    low = np.array([r[0] for r in PROBE_RANGES])
+    high = np.array([r[1] for r in PROBE_RANGES])
+    features = rng.uniform(low, high, size=(200, len(PROBE_RANGES)))
+    labels = np.array(classes)[rng.integers(0, len(classes), size=200)]
+    model = MLPClassifier(hidden_layer_sizes=hidden_layer_sizes, activation=activation,
+                          max_iter=50, random_state=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model.fit(features, labels)
+    return model, features
+
+
+@pytest.mark.parametrize("activation", ["relu", "tanh", "logistic", "identity"])
+@pytest.mark.parametrize("classes", [["normal", "overheating"], ["normal", "overheating", "short_circuit"]])
+def test_predictions_equal_model(activation, classes):
+    """ Same classes of model.predict, binary and multiclass """
+    model, features = fit(activation, classes)
+    engine = NumpyMLP(model, max_batch=16)
+    # Batches larger than the buffers reallocate them
+    for rows in (1, 16, 200):
+        np.testing.assert_array_equal(engine.predict(features[:rows]), model.predict(features[:rows]))
+    assert engine.matches(model)
+
+
+def test_from_model_rejects_unsupported():
+    """ Models without the MLP weights get no engine """
+    assert NumpyMLP.from_model(object()) is None
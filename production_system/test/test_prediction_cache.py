@@ -0,0 +1,101 @@
+""" Tests of the cache of the primary classifier predictions """
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from production_system.classifier import prediction_cache
+from production_system.classifier.classifier import Classifier
+from production_system.classifier.prediction_cache import PredictionCache
+from production_system.model.label_type import LabelType
+from production_system.model.prepared_session import PreparedSession
+
+
+class Clock:
+    """ Monotonic clock moved by the test """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        """ Current time """
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch):
+    """ Clock of the cache """
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_key_quantizes_features():
+    """ Features equal up to the precision share the key """
+    cache = PredictionCache(precision=1)
+    assert cache.key((1.04, 2.0)) == cache.key((0.96, 2.01))
+    assert cache.key((1.04, 2.0)) != cache.key((1.2, 2.0))
+
+
+def test_least_recently_used_evicted(clock):
+    """ The entry not read for the longest time goes first """
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", LabelType.NONE)
+    cache.put("b", LabelType.OVERHEATING)
+    assert cache.get("a") == LabelType.NONE
+    cache.put("c", LabelType.ELECTRICAL)
+    assert cache.get("b") is None
+    assert cache.get("a") == LabelType.NONE
+    assert cache.get("c") == LabelType.ELECTRICAL
+
+
+def test_expired_entry_missed(clock):
+    """ Entries older than the TTL are removed on read """
+    cache = PredictionCache(ttl_seconds=10)
+    cache.put("a", LabelType.NONE)
+    clock.now = 10.0
+    assert cache.get("a") == LabelType.NONE
+    clock.now = 10.5
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 0)
+
+
+class CountingModel:
+    """ Predicts overheating above 50 degrees, counts the predicted rows """
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, features):
+        """ One label per row """
+        self.rows += len(features)
+        return np.where(features[:, 2] > 50, "overheating", "none")
+
+
+def prepared_session(uuid, temperature):
+    """ Prepared session with the given appliance temperature """
+    return PreparedSession.from_json({
+        "UUID": uuid, "mean_current": 1.0, "mean_voltage": 230.0, "mean_temperature": temperature,
+        "mean_external_temperature": 20.0, "mean_external_humidity": 50.0, "mean_occupancy": 2.0
+    })
+
+
+def test_classifier_predicts_missed_keys_once(clock):
+    """ Only the sessions not cached are predicted, once per key within a batch """
+    classifier = Classifier()
+    classifier.model = CountingModel()
+    classifier.set_cache(PredictionCache(precision=0))
+
+    labels = classifier.infer_batch([prepared_session(0, 40.1), prepared_session(1, 40.2),
+                                     prepared_session(2, 70.0)])
+    assert [label.get_label_type() for label in labels] == [LabelType.NONE, LabelType.NONE,
+                                                           LabelType.OVERHEATING]
+    assert classifier.model.rows == 2
+
+    labels = classifier.infer_batch([prepared_session(3, 70.3), prepared_session(4, 90.0)])
+    assert [label.get_label_type() for label in labels] == [LabelType.OVERHEATING, LabelType.OVERHEATING]
+    assert classifier.model.rows == 3
+    assert [label.get_uuid() for label in labels] == [3, 4]
@@ -0,0 +1,105 @@
+""" Tests of the shadow classifiers inference of the classification system """
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from production_system.controller import classification_system
+from production_system.controller.classification_system import ClassificationSystem
+from production_system.model.label import Label
+from production_system.model.label_type import LabelType
+
+
+class FakeConfiguration:
+    """ Switches phase every two sessions """
+
+    def get_sys_params(self):
+        """ System parameters """
+        return {"development_phase": False, "production_sessions": 2, "evaluation_sessions": 2}
+
+    def get_addresses(self):
+        """ Every system on the same address """
+        address = {"ip": "127.0.0.1", "port": 0}
+        return {"evaluation_system": address, "ingestion_system": address, "client_side_system": address}
+
+
+class FakeMessageController:
+    """ Returns the queued prepared sessions as a single batch """
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def receive_batch(self, max_size, max_wait):
+        """ The whole batch """
+        return self.messages
+
+
+class FakeClassifier:
+    """ Labels every session as NONE, records the inferred sessions """
+
+    def __init__(self):
+        self.inferred = []
+
+    def infer_batch(self, prep_sessions):
+        """ One label per session """
+        self.inferred.append([session.get_uuid() for session in prep_sessions])
+        return [Label(uuid=session.get_uuid(), label_type=LabelType.NONE)
+                for session in prep_sessions]
+
+
+class FakeRegistry:
+    """ A single shadow classifier """
+
+    def __init__(self, shadow):
+        self.shadow = shadow
+
+    def get_shadows(self):
+        """ Shadows by name """
+        return {"candidate": self.shadow}
+
+
+def prepared_session(uuid):
+    """ Valid prepared session message """
+    return {"UUID": uuid, "mean_current": 1.0, "mean_voltage": 230.0, "mean_temperature": 40.0,
+            "mean_external_temperature": 20.0, "mean_external_humidity": 50.0, "mean_occupancy": 2.0}
+
+
+@pytest.fixture(name="sent")
+def fixture_sent(monkeypatch):
+    """ Messages sent by the system, by endpoint """
+    sent = []
+    monkeypatch.setattr(classification_system.MessagingJsonController, "send",
+                        lambda ip, port, endpoint, data: sent.append((endpoint, data)))
+    return sent
+
+
+def make_system(messages, phase):
+    """ Classification system in the given phase, with a primary and a shadow classifier """
+    system = ClassificationSystem()
+    system._conf = FakeConfiguration()
+    system._msg_controller = FakeMessageController(messages)
+    system._classifier = FakeClassifier()
+    system._model_registry = FakeRegistry(FakeClassifier())
+    system._session_counter = 0
+    system._current_session = phase
+    system._batch_size = len(messages)
+    return system
+
+
+def test_no_shadow_inference_in_production(sent):
+    """ Production batches are not inferred by the shadows """
+    system = make_system([prepared_session(0)], ClassificationSystem.PHASE_PRODUCTION)
+    system.classify_batch()
+    assert system._model_registry.shadow.inferred == []
+    assert not [endpoint for endpoint, _ in sent if endpoint.startswith("/label/shadow")]
+
+
+def test_shadow_inference_of_evaluated_sessions_only(sent):
+    """ A batch crossing the phase switch infers, and sends, only the evaluated sessions """
+    system = make_system([prepared_session(uuid) for uuid in range(4)], ClassificationSystem.PHASE_EVALUATION)
+    system.classify_batch()
+    assert system._classifier.inferred == [[0, 1, 2, 3]]
+    assert system._model_registry.shadow.inferred == [[0, 1]]
+    shadow_sent = [data for endpoint, data in sent if endpoint == "/label/shadow/candidate"]
+    assert [[label["UUID"] for label in labels] for labels in shadow_sent] == [[0, 1]]
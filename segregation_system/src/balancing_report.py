@@ -1,6 +1,8 @@
 import os
 import plotly.graph_objects as go
 
+from segregation_system.src.prepared_session_db_manager import PreparedSessionSnapshot
+
 
 class BalancingReport:
 
@@ -9,7 +11,10 @@ class BalancingReport:
 
     def generate_balancing_report(self, dataset, tolerance_percentage=10):
         # Extract labels
-        labels = [row[-1] if isinstance(row, tuple) else row['label'] for row in dataset]
+        if isinstance(dataset, PreparedSessionSnapshot):
+            labels = dataset.labels
+        else:
+            labels = [row[-1] if isinstance(row, tuple) else row['label'] for row in dataset]
 
         # Count occurrences of each label
         label_counts = {}
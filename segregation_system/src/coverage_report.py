@@ -1,6 +1,8 @@
 import os
 import plotly.graph_objects as go
 
+from segregation_system.src.prepared_session_db_manager import PreparedSessionSnapshot
+
 
 class CoverageReport:
 
@@ -35,10 +37,15 @@ class CoverageReport:
         feature_sums = {f: 0 for f in features}
         n = len(dataset)
 
-        for row in dataset:
-            for i, f in enumerate(features):
-                value = row[i + 1] if isinstance(row, tuple) else row[f]
-                feature_sums[f] += value
+        if isinstance(dataset, PreparedSessionSnapshot):
+            # column sums of the features matrix
+            for f, value in zip(features, dataset.features.sum(axis=0).tolist()):
+                feature_sums[f] = value
+        else:
+            for row in dataset:
+                for i, f in enumerate(features):
+                    value = row[i + 1] if isinstance(row, tuple) else row[f]
+                    feature_sums[f] += value
 
         feature_avg = {f: feature_sums[f] / n for f in features}
 
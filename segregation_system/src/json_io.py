@@ -1,7 +1,10 @@
 import queue
 from threading import Thread
 from flask import Flask, request
-from requests import post, exceptions
+from requests import exceptions
+
+from segregation_system.src.pooled_transport import PooledTransport
+from segregation_system.src.wire_format import WireFormat, WireRequest
 
 
 class JsonIO:
@@ -9,6 +12,8 @@ class JsonIO:
 
     def __init__(self):
         self._app = Flask(__name__)
+        # JSON or MessagePack bodies, by Content-Type
+        self._app.request_class = WireRequest
         self._received_json_queue = queue.Queue()
 
     @staticmethod
@@ -37,7 +42,7 @@ class JsonIO:
         url = f'http://{ip}:{port}/' + endpoint
         response = None
         try:
-            response = post(url, json=data, timeout=10.0)
+            response = WireFormat.get_instance().post(url, data, timeout=10.0)
         except exceptions.RequestException:
             print("Endpoint system unreachable")
             return False
@@ -52,6 +57,22 @@ class JsonIO:
 
         return True
 
+    def send_stream(self, ip, port, endpoint, chunks):
+        # chunks is an iterable of bytes, sent with chunked transfer encoding as NDJSON
+        url = f'http://{ip}:{port}/' + endpoint
+        try:
+            response = PooledTransport.get_instance().post(
+                url, data=chunks, headers={'Content-Type': 'application/x-ndjson'}, timeout=10.0)
+        except exceptions.RequestException:
+            print("Endpoint system unreachable")
+            return False
+
+        if response.status_code != 200:
+            print(f'Sending Error: {response.text}')
+            return False
+
+        return True
+
 
 app = JsonIO.get_instance().get_app()
 
@@ -66,6 +87,16 @@ def post_json():
     return {}, 200
 
 
+@app.post('/prepared_sessions')
+def post_json_batch():
+    if not isinstance(request.json, list):
+        return {'error': 'No JSON array received'}, 500
+
+    for received_json in request.json:
+        JsonIO.get_instance().put_json_into_queue(received_json)
+    return {}, 200
+
+
 @app.route("/")
 def home():
     return "Segregation System online!"
@@ -1,3 +1,5 @@
+import json
+
 from sklearn.model_selection import train_test_split
 
 class LearningSetsGenerator:
@@ -35,3 +37,20 @@ class LearningSetsGenerator:
             'test': test,
             'validation': validation
         }
+
+    def stream_learning_sets(self, learning_sets, chunk_rows=1000):
+        # NDJSON body of the learning sets, one {"set", "features", "label"} line per session,
+        # yielded chunk_rows lines at a time so that the whole payload is never built in memory
+        lines = []
+        for learning_set, sessions in learning_sets.items():
+            for session in sessions:
+                lines.append(json.dumps({
+                    "set": learning_set,
+                    "features": session["features"],
+                    "label": session["label"]
+                }))
+                if len(lines) >= chunk_rows:
+                    yield ("\n".join(lines) + "\n").encode()
+                    lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,104 @@
+""" Module for the HTTP transport keeping a pooled keep-alive session per destination """
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledTransport:
+    """
+    HTTP transport keeping a persistent keep-alive session, with its own connection pool, for every destination
+    """
+
+    _instance = None
+
+    pool_connections: int
+    """
+    Number of connection pools cached by every session
+    """
+
+    pool_maxsize: int
+    """
+    Maximum number of connections kept open towards a destination
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 8):
+        """
+        Constructor
+        :param pool_connections: int
+        :param pool_maxsize: int
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        if PooledTransport._instance is None:
+            PooledTransport._instance = PooledTransport()
+        return PooledTransport._instance
+
+    def configure(self, pool_connections: int, pool_maxsize: int):
+        """
+        Sets the pool sizes, existing sessions are closed and recreated on the next request,
+        the per-destination statistics restart
+        :param pool_connections: int
+        :param pool_maxsize: int
+        :return: None
+        """
+        with self._lock:
+            self.pool_connections = pool_connections
+            self.pool_maxsize = pool_maxsize
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._requests = {}
+
+    def _get_session(self, destination: str) -> requests.Session:
+        """
+        Gets the session of a destination, creating it if needed
+        :param destination: str
+        :return: requests.Session
+        """
+        with self._lock:
+            session = self._sessions.get(destination)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[destination] = session
+            self._requests[destination] = self._requests.get(destination, 0) + 1
+            return session
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a POST request reusing an open connection towards the destination if possible,
+        same arguments and exceptions as requests.post
+        :param url: str
+        :return: requests.Response
+        """
+        parts = urlsplit(url)
+        destination = f"{parts.scheme}://{parts.netloc}"
+        return self._get_session(destination).post(url, **kwargs)
+
+    def get_stats(self) -> dict:
+        """
+        Gets, for every destination, the number of requests, the connections opened and the reuse ratio
+        :return: dict
+        """
+        stats = {}
+        with self._lock:
+            for destination, session in self._sessions.items():
+                pool = session.get_adapter(destination).poolmanager.connection_from_url(destination)
+                requests_count = self._requests.get(destination, 0)
+                connections = pool.num_connections
+                stats[destination] = {
+                    "requests": requests_count,
+                    "connections": connections,
+                    "reuse_ratio": 1 - connections / requests_count if requests_count else 0.0
+                }
+        return stats
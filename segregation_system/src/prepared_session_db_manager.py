@@ -1,15 +1,56 @@
 import os
 import sys
 import sqlite3
+import threading
+
+import numpy as np
+
+FEATURES = [
+    "mean_current",
+    "mean_voltage",
+    "mean_temperature",
+    "mean_external_temperature",
+    "mean_external_humidity",
+    "mean_occupancy"
+]
+
+
+class PreparedSessionSnapshot:
+    # Columnar copy of the stored prepared sessions, loaded once per segregation cycle and
+    # shared by the balancing, coverage and learning states
+
+    def __init__(self, uuids, features, labels):
+        self.uuids = uuids
+        # (sessions, 6) float64 matrix in FEATURES order, missing means are NaN
+        self.features = features
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        # (uuid, 6 features, label) tuples, like the rows of get_all_sessions()
+        for uuid, features, label in zip(self.uuids, self.features.tolist(), self.labels):
+            yield (uuid, *[None if value != value else value for value in features], label)
 
 
 class PreparedSessionStorage:
 
-    def __init__(self):
+    def __init__(self, batch_size=1, commit_seconds=0.0, fetch_size=1000):
         self.prepared_session_counter = 0
+        self.batch_size = batch_size
+        self.commit_seconds = commit_seconds
+        self.fetch_size = fetch_size
+        # sessions received but not yet written, flushed with a single executemany
+        self._pending = []
+        # commits the pending sessions commit_seconds after the oldest of them was received
+        self._timer = None
+        # the timer flushes from its own thread: pending sessions, writes and counter go under the lock
+        self._lock = threading.RLock()
+        self._snapshot = None
         db_path = os.path.expanduser('~/segregation_db.db')
         try:
-            self._conn = sqlite3.connect(db_path)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
         except sqlite3.Error as e:
             print(f'[SEGREGATION SYSTEM] SQL Connection Error [{e}]')
             sys.exit(1)
@@ -17,6 +58,10 @@ class PreparedSessionStorage:
         # init database
         cursor = self._conn.cursor()
 
+        # WAL: commits append to the log instead of rewriting the database file
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+
         # prepared session table
         cursor.execute("""
                 CREATE TABLE IF NOT EXISTS prepared_session (
@@ -32,17 +77,83 @@ class PreparedSessionStorage:
         """)
         self._conn.commit()
 
+    def configure(self, batch_size=1, commit_seconds=0.0, fetch_size=1000):
+        # batch_size sessions are written per commit, the pending ones are also committed
+        # when commit_seconds have passed since the last commit (0 disables the timer)
+        self.flush()
+        self.batch_size = max(1, batch_size)
+        self.commit_seconds = commit_seconds
+        self.fetch_size = max(1, fetch_size)
+
     def get_session_number(self):
         return self.prepared_session_counter
 
     def increment_session_counter(self):
-        self.prepared_session_counter = self.prepared_session_counter + 1
+        with self._lock:
+            self.prepared_session_counter = self.prepared_session_counter + 1
 
     def reset_counter(self):
-        self.prepared_session_counter = 0
+        with self._lock:
+            self.prepared_session_counter = 0
 
     def store_prepared_session(self, prepared_session):
 
+        try:
+            values = (
+                prepared_session["UUID"],
+                prepared_session["mean_current"],
+                prepared_session["mean_voltage"],
+                prepared_session["mean_temperature"],
+                prepared_session["mean_external_temperature"],
+                prepared_session["mean_external_humidity"],
+                prepared_session["mean_occupancy"],
+                prepared_session["label"]
+            )
+        except Exception as e:
+            print(f"[SEGREGATION SYSTEM] Error: unable to add session "
+                  f"(uuid: {prepared_session.get('UUID', 'UNKNOWN')}): {e}")
+            return False
+
+        with self._lock:
+            self._pending.append(values)
+            self._snapshot = None
+            # counted when received, flush() takes back the sessions it is not able to write
+            self.increment_session_counter()
+
+            batch_full = len(self._pending) >= self.batch_size
+            if not batch_full and self.commit_seconds and self._timer is None:
+                self._timer = threading.Timer(self.commit_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        print(f"[SEGREGATION SYSTEM] Received new prepared session "
+              f"(uuid: {prepared_session.get('UUID')})")
+
+        if batch_full:
+            return self.flush()
+        return True
+
+    def flush(self):
+        # writes the pending sessions in a single transaction, False if some of them were dropped
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return True
+
+            pending = self._pending
+            self._pending = []
+            dropped = self._write(pending)
+
+            self.prepared_session_counter = self.prepared_session_counter - dropped
+
+        print(f"[SEGREGATION SYSTEM] Stored {len(pending) - dropped} prepared sessions")
+        return dropped == 0
+
+    def _write(self, rows):
+        # one executemany, on error the rows are inserted one by one and only the
+        # failing ones are dropped; returns the number of dropped rows
         query = """
                 INSERT INTO prepared_session (
                     uuid,
@@ -56,54 +167,91 @@ class PreparedSessionStorage:
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """
 
-
-        values = (
-            prepared_session["UUID"],
-            prepared_session["mean_current"],
-            prepared_session["mean_voltage"],
-            prepared_session["mean_temperature"],
-            prepared_session["mean_external_temperature"],
-            prepared_session["mean_external_humidity"],
-            prepared_session["mean_occupancy"],
-            prepared_session["label"]
-        )
-
+        cur = self._conn.cursor()
         try:
-            cur = self._conn.cursor()
-            cur.execute(query, values)
+            cur.executemany(query, rows)
             self._conn.commit()
-        except Exception as e:
-            print(f"[SEGREGATION SYSTEM] Error: unable to add session "
-                  f"(uuid: {prepared_session.get('UUID', 'UNKNOWN')}): {e}")
-            return False
+            return 0
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            print(f"[SEGREGATION SYSTEM] Error: unable to add {len(rows)} sessions at once, "
+                  f"adding them one by one: {e}")
 
-        print(f"[SEGREGATION SYSTEM] Stored new prepared session "
-              f"(uuid: {prepared_session.get('UUID')})")
+        dropped = 0
+        for values in rows:
+            try:
+                # a failing INSERT only undoes itself, the rows before it stay in the transaction
+                cur.execute(query, values)
+            except sqlite3.Error as e:
+                dropped = dropped + 1
+                print(f"[SEGREGATION SYSTEM] Error: unable to add session (uuid: {values[0]}): {e}")
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            print(f"[SEGREGATION SYSTEM] Error: unable to add {len(rows)} sessions: {e}")
+            return len(rows)
+        return dropped
 
-        self.increment_session_counter()
+    def _iter_blocks(self, fetch_size=None):
+        # blocks of fetch_size (uuid, 6 features, label) rows, pending sessions are flushed first;
+        # sessions are stored by the same thread reading them, so no timer runs while reading
+        self.flush()
+        cur = self._conn.cursor()
+        cur.execute("""
+            SELECT uuid, mean_current, mean_voltage, mean_temperature,
+                   mean_external_temperature, mean_external_humidity, mean_occupancy, label
+            FROM prepared_session
+        """)
+        while True:
+            rows = cur.fetchmany(fetch_size or self.fetch_size)
+            if not rows:
+                return
+            yield rows
 
-        return True
+    def iter_sessions(self, fetch_size=None):
+        # rows read through the cursor, the table is never loaded in memory as a whole
+        for rows in self._iter_blocks(fetch_size):
+            yield from rows
 
     def get_all_sessions(self):
         try:
-            cur = self._conn.cursor()
-            cur.execute("""
-                SELECT uuid, mean_current, mean_voltage, mean_temperature,
-                       mean_external_temperature, mean_external_humidity, mean_occupancy, label
-                FROM prepared_session
-            """)
-            sessions = cur.fetchall()
-            return sessions
+            return list(self.iter_sessions())
         except Exception as e:
             print(f"[ERROR] Unable to fetch sessions: {e}")
             return []
 
-    def clear_dataset(self):
+    def load_snapshot(self):
+        # columnar snapshot of the dataset, read once and reused until the dataset changes
+        if self._snapshot is not None:
+            return self._snapshot
+
+        uuids, labels, blocks = [], [], []
         try:
-            cur = self._conn.cursor()
-            cur.execute("DELETE FROM prepared_session")
-            self._conn.commit()
-            print("[INFO] Dataset successfully cleared.")
+            for rows in self._iter_blocks():
+                uuids.extend(row[0] for row in rows)
+                labels.extend(row[-1] for row in rows)
+                blocks.append(np.array([row[1:-1] for row in rows], dtype=np.float64))
         except Exception as e:
-            self._conn.rollback()
-            print(f"[ERROR] Unable to clear the dataset: {e}")
+            print(f"[ERROR] Unable to fetch sessions: {e}")
+            return PreparedSessionSnapshot([], np.empty((0, len(FEATURES)), dtype=np.float64), [])
+
+        features = np.concatenate(blocks) if blocks else np.empty((0, len(FEATURES)), dtype=np.float64)
+        self._snapshot = PreparedSessionSnapshot(uuids, features, labels)
+        return self._snapshot
+
+    def clear_dataset(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = []
+            self._snapshot = None
+            try:
+                cur = self._conn.cursor()
+                cur.execute("DELETE FROM prepared_session")
+                self._conn.commit()
+                print("[INFO] Dataset successfully cleared.")
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                print(f"[ERROR] Unable to clear the dataset: {e}")
@@ -7,6 +7,8 @@ import random
 from threading import Thread
 from datetime import datetime
 from segregation_system.src.json_io import JsonIO
+from segregation_system.src.pooled_transport import PooledTransport
+from segregation_system.src.wire_format import WireFormat
 from segregation_system.src.prepared_session_db_manager import PreparedSessionStorage
 from segregation_system.src.balancing_report import BalancingReport
 from segregation_system.src.coverage_report import CoverageReport
@@ -65,6 +67,15 @@ class SegregationSystem:
 
         logging.info("Configuration loaded")
 
+        http_pool = self.segregation_system_config.get("http_pool", {})
+        PooledTransport.get_instance().configure(http_pool.get("pool_connections", 4),
+                                                 http_pool.get("pool_maxsize", 8))
+        WireFormat.get_instance().configure(self.segregation_system_config.get("wire_format", "json"))
+        storage = self.segregation_system_config.get("storage", {})
+        self.prepared_session_storage.configure(storage.get("batch_size", 1),
+                                                storage.get("commit_seconds", 0.0),
+                                                storage.get("fetch_size", 1000))
+
         jsonIO = JsonIO.get_instance()
         listener = Thread(
             target=jsonIO.listener,
@@ -108,7 +119,7 @@ class SegregationSystem:
             elif current_state == "BALANCING":
 
                 logging.info("Balancing state entered")
-                dataset = self.prepared_session_storage.get_all_sessions()
+                dataset = self.prepared_session_storage.load_snapshot()
 
                 self.balancing_report.generate_balancing_report(
                     dataset,
@@ -143,7 +154,7 @@ class SegregationSystem:
             elif current_state == "COVERAGE":
 
                 logging.info("Coverage state entered")
-                dataset = self.prepared_session_storage.get_all_sessions()
+                dataset = self.prepared_session_storage.load_snapshot()
 
                 self.coverage_report.generate_coverage_report(dataset)
                 logging.info("Coverage report generated")
@@ -175,15 +186,26 @@ class SegregationSystem:
             elif current_state == "LEARNING":
 
                 logging.info("Learning state entered")
-                dataset = self.prepared_session_storage.get_all_sessions()
+                dataset = self.prepared_session_storage.load_snapshot()
 
                 learning_sets = self.learning_sets.generate_learning_sets(dataset)
-                logging.info(f"Learning sets generated: {learning_sets}")
-
-                JsonIO.get_instance().send(self.segregation_system_config['development_system']['ip'],
-                                           self.segregation_system_config['development_system']['port'],
-                                           "/learning_sets",
-                                           learning_sets)
+                logging.info("Learning sets generated: " +
+                             ", ".join(f"{name} {len(sessions)}" for name, sessions in learning_sets.items()))
+
+                # Large learning sets are streamed as NDJSON instead of a single JSON document
+                stream_config = self.segregation_system_config.get("learning_sets_stream", {})
+                if stream_config.get("enabled", False):
+                    JsonIO.get_instance().send_stream(
+                        self.segregation_system_config['development_system']['ip'],
+                        self.segregation_system_config['development_system']['port'],
+                        "/learning_sets/stream",
+                        self.learning_sets.stream_learning_sets(learning_sets,
+                                                                stream_config.get("chunk_rows", 1000)))
+                else:
+                    JsonIO.get_instance().send(self.segregation_system_config['development_system']['ip'],
+                                               self.segregation_system_config['development_system']['port'],
+                                               "/learning_sets",
+                                               learning_sets)
 
                 print(
                     f"{self.segregation_system_config['development_system']['ip']}:{self.segregation_system_config['development_system']['port']}")
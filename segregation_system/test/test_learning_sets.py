@@ -0,0 +1,23 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from segregation_system.src.learning_sets import LearningSetsGenerator
+
+
+def test_stream_learning_sets():
+    learning_sets = {
+        "training": [{"features": [float(i)] * 6, "label": "none"} for i in range(5)],
+        "validation": [{"features": [1.0] * 6, "label": "overheating"}],
+        "test": []
+    }
+
+    chunks = list(LearningSetsGenerator().stream_learning_sets(learning_sets, chunk_rows=2))
+
+    # every chunk ends on a line boundary
+    assert len(chunks) == 3
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [line["set"] for line in lines] == ["training"] * 5 + ["validation"]
+    assert lines[5] == {"set": "validation", "features": [1.0] * 6, "label": "overheating"}
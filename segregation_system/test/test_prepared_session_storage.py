@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from segregation_system.src.prepared_session_db_manager import PreparedSessionStorage
+
+
+def prepared_session(uuid, label="none"):
+    return {
+        "UUID": uuid,
+        "mean_current": 1.0,
+        "mean_voltage": 230.0,
+        "mean_temperature": 40.0,
+        "mean_external_temperature": 21.0,
+        "mean_external_humidity": None,
+        "mean_occupancy": 2.0,
+        "label": label
+    }
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    # the database is created in the home directory
+    monkeypatch.setenv("HOME", str(tmp_path))
+    storage = PreparedSessionStorage()
+    yield storage
+    storage.clear_dataset()
+
+
+def stored_uuids(storage):
+    return [row[0] for row in storage.iter_sessions()]
+
+
+def test_batch_written_when_full(storage):
+    storage.configure(batch_size=3)
+    storage.store_prepared_session(prepared_session(1))
+    storage.store_prepared_session(prepared_session(2))
+    assert storage._pending
+
+    assert storage.store_prepared_session(prepared_session(3))
+    assert not storage._pending
+    assert stored_uuids(storage) == [1, 2, 3]
+    assert storage.get_session_number() == 3
+
+
+def test_pending_flushed_before_read(storage):
+    storage.configure(batch_size=10)
+    storage.store_prepared_session(prepared_session(1))
+    snapshot = storage.load_snapshot()
+    assert snapshot.uuids == [1]
+    assert np.isnan(snapshot.features[0, 4])
+
+
+def test_only_failing_session_dropped(storage):
+    storage.configure(batch_size=3)
+    storage.store_prepared_session(prepared_session(1))
+    # a label that sqlite is not able to bind
+    storage.store_prepared_session(prepared_session(2, label={"label": "none"}))
+
+    assert not storage.store_prepared_session(prepared_session(3))
+    assert stored_uuids(storage) == [1, 3]
+    assert storage.get_session_number() == 2
+
+
+def test_pending_committed_by_timer(storage):
+    storage.configure(batch_size=10, commit_seconds=0.05)
+    storage.store_prepared_session(prepared_session(1))
+    timer = storage._timer
+    assert timer is not None
+
+    timer.join(5)
+    assert not storage._pending
+    assert storage._timer is None
+    assert stored_uuids(storage) == [1]
+
+
+def test_timer_cancelled_by_flush(storage):
+    storage.configure(batch_size=2, commit_seconds=60)
+    storage.store_prepared_session(prepared_session(1))
+    timer = storage._timer
+    storage.store_prepared_session(prepared_session(2))
+
+    assert storage._timer is None
+    assert timer.finished.is_set()
@@ -0,0 +1,41 @@
+""" Micro-benchmark of the JSON schema validation of the messages received by the systems.
+Run from the repository root: python -m tools.benchmark_validation """
+import timeit
+
+import jsonschema
+
+from production_system.model.label import Label
+from production_system.model.prepared_session import PreparedSession
+from evaluation_system.model.label import Label as EvaluationLabel
+
+ITERATIONS = 5000
+
+PREPARED_SESSION = {
+    "UUID": 1,
+    "mean_current": 5.2,
+    "mean_voltage": 229.8,
+    "mean_temperature": 41.3,
+    "mean_external_temperature": 21.7,
+    "mean_external_humidity": 48.1,
+    "mean_occupancy": 2.0,
+    "label": None
+}
+LABEL = {"UUID": 1, "type": "overheating", "timestamp": "2025-01-01 00:00:00"}
+EVALUATION_LABEL = {"UUID": 1, "label": "overheating", "timestamp": "2025-01-01 00:00:00"}
+
+
+def compare(name, schema, data, from_json):
+    """ Prints the time per message of jsonschema.validate and of from_json """
+    per_call = timeit.timeit(lambda: jsonschema.validate(instance=data, schema=schema),
+                             number=ITERATIONS) / ITERATIONS * 1e6
+    precompiled = timeit.timeit(lambda: from_json(data), number=ITERATIONS) / ITERATIONS * 1e6
+    print(f"{name}: jsonschema.validate {per_call:.1f} us, "
+          f"from_json (precompiled) {precompiled:.1f} us, speedup {per_call / precompiled:.1f}x")
+
+
+if __name__ == "__main__":
+    compare("PreparedSession", PreparedSession.PREPARED_SESSION_SCHEMA, PREPARED_SESSION,
+            PreparedSession.from_json)
+    compare("production Label", Label.RECEIVED_LABEL_SCHEMA, LABEL, Label.from_json)
+    compare("evaluation Label", EvaluationLabel.RECEIVED_LABEL_SCHEMA, EVALUATION_LABEL,
+            EvaluationLabel.from_json)